@@ -0,0 +1,253 @@
+"""Long-running analysis service speaking line-delimited JSON over TCP
+
+Each line a client sends is one request, answered by one line. Requests on a connection
+are handled concurrently, so responses can come back out of order; a request's 'id',
+if given, is echoed in its response. The searches run on a pool of worker processes,
+each keeping one MinimaxAI (and its transposition table, endgame database and opening
+book) warm across requests, so the event loop never blocks on a search.
+
+A request names a position and a budget:
+
+    {"id": 1, "position": {"white": ["a1", "d2"], "black": ["g7"], "side": "black",
+     "in_hand": [7, 8]}, "time_ms": 500}
+
+Squares are named as in main.square_name. A position gives either 'in_hand' (pieces
+each side still has to place) or 'placed' (pieces placed so far), and may set
+'pending_removal'. Positions that cannot arise in a game are rejected. The budget is
+'depth', 'time_ms' or both; without either the server default time applies, and no
+search runs longer than the server's maximum time, whatever its depth. A request
+with a 'positions' list instead of 'position' is analysed as a batch, spread over the
+pool, and answered with a 'results' list.
+
+The response holds the best move in main.move_notation form and as an encoded turn,
+the score (from white's point of view), the principal variation and search statistics,
+or an 'error' message.
+
+    python analysis_server.py --port 7878 --workers 4
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from arena import turn_from_best_move
+from main import ENDGAME_DATABASE, OPENING_BOOK, SQUARE_NAMES, Game, MinimaxAI, move_notation
+
+SIDES = {'white': 0, 'w': 0, 'black': 1, 'b': 1}
+
+# Worker side: the process's engine, set by _init_worker
+_engine = None
+
+
+def _init_worker(tt_size_mb, endgame_path, book_path):
+    global _engine
+    endgame_db = book = None
+    if endgame_path is not None:
+        from endgame_db import EndgameDatabase
+        endgame_db = EndgameDatabase(endgame_path)
+    if book_path is not None:
+        from opening_book import OpeningBook
+        book = OpeningBook(book_path)
+    _engine = MinimaxAI(Game(), tt_size_mb, endgame_db, book=book)
+
+
+def is_count(value):
+    """Whether a JSON value is an integer; JSON true and false load as bool, a kind of int"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def parse_position(spec):
+    """Game.position() tuple of a request's position object; raises ValueError if invalid"""
+    if not isinstance(spec, dict):
+        raise ValueError("position must be an object")
+    bitboards = []
+    for colour in ('white', 'black'):
+        mask = 0
+        for name in spec.get(colour, ()):
+            if name not in SQUARE_NAMES:
+                raise ValueError(f"unknown square {name!r}")
+            mask |= 1 << SQUARE_NAMES[name]
+        bitboards.append(mask)
+    white, black = bitboards
+    if white & black:
+        raise ValueError("a square holds both colours")
+    side = SIDES.get(str(spec.get('side', 'white')).lower())
+    if side is None:
+        raise ValueError("side must be 'white' or 'black'")
+    if 'in_hand' in spec:
+        in_hand = spec['in_hand']
+        if (not isinstance(in_hand, list) or len(in_hand) != 2
+                or not all(is_count(count) and 0 <= count <= 9 for count in in_hand)):
+            raise ValueError("in_hand must be two counts from 0 to 9")
+        placed = 18 - sum(in_hand)
+        if 9 - in_hand[0] != (placed + 1) // 2:
+            raise ValueError("white places first, so white has as many pieces in hand as black or one fewer")
+    elif 'placed' in spec:
+        placed = spec['placed']
+        if not is_count(placed) or not 0 <= placed <= 18:
+            raise ValueError("placed must be from 0 to 18")
+    else:
+        raise ValueError("position needs 'in_hand' or 'placed'")
+    # White places first, so after placed placements white has made the odd-numbered ones
+    if white.bit_count() > (placed + 1) // 2 or black.bit_count() > placed // 2:
+        raise ValueError("more pieces on the board than have been placed")
+    pending_removal = bool(spec.get('pending_removal', False))
+    if pending_removal:
+        if not (black if side == 0 else white):
+            raise ValueError("a removal is pending but the opponent has no pieces")
+        if placed < 18 and side != (placed - 1) % 2:
+            raise ValueError("a removal is pending for the side that did not place last")
+    elif placed < 18 and side != placed % 2:
+        raise ValueError(f"{'white' if placed % 2 == 0 else 'black'} is to place next")
+    return white, black, placed, side, pending_removal
+
+
+def analyse(position, depth, time_ms):
+    """Search a position on this worker's engine and return the response fields"""
+    ai = _engine
+    game = ai.game
+    game.set_position(position)
+    game_over, winner = game.is_game_over()
+    if game_over:
+        return {'game_over': True, 'winner': 'white' if winner == 'W' else 'black'}
+    best_move = ai.get_best_move(depth=depth, time_ms=time_ms)
+    if best_move is None:
+        return {'error': "no legal turn in this position"}
+    turn = turn_from_best_move(best_move)
+    return {
+        'best_move': move_notation(turn),
+        'turn': turn,
+        'score': ai.best_score,
+        'pv': [move_notation(move) for move in ai.pv] or [move_notation(turn)],
+        'depth': ai.depth_reached,
+        'nodes': ai.nodes,
+        'quiescence_nodes': ai.quiescence_nodes,
+        'endgame_hits': ai.endgame_hits,
+        'book': ai.book_hit,
+        'elapsed_ms': round(ai.elapsed * 1000, 2),
+        'nodes_per_sec': round(ai.nodes_per_second),
+    }
+
+
+class AnalysisServer:
+    """asyncio server handing searches to a process pool of warm engines
+
+    endgame_path and book_path are files each worker loads once at start-up. Every search
+    stops after max_time_ms, so a deep or long request cannot hold a worker indefinitely.
+    """
+
+    def __init__(self, workers=None, tt_size_mb=16, endgame_path=None, book_path=None, default_time_ms=1000,
+                 max_time_ms=60000):
+        self.workers = workers or os.cpu_count() or 1
+        self.default_time_ms = default_time_ms
+        self.max_time_ms = max_time_ms
+        self.executor = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                            initargs=(tt_size_mb, endgame_path, book_path))
+
+    def close(self):
+        """Shut the worker pool down"""
+        self.executor.shutdown()
+
+    async def search(self, spec, depth, time_ms):
+        """Response fields for one position spec, or an error"""
+        try:
+            position = parse_position(spec)
+        except (TypeError, ValueError) as error:
+            return {'error': str(error)}
+        time_ms = self.max_time_ms if time_ms is None else min(time_ms, self.max_time_ms)
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.executor, analyse, position, depth, time_ms)
+        except Exception as error:
+            return {'error': f"analysis failed: {type(error).__name__}: {error}"}
+
+    async def respond(self, line):
+        """Response object for one request line"""
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be an object")
+        except ValueError as error:
+            return {'error': f"bad request: {error}"}
+        response = {'id': request['id']} if 'id' in request else {}
+        depth = request.get('depth')
+        time_ms = request.get('time_ms')
+        if depth is None and time_ms is None:
+            time_ms = self.default_time_ms
+        if depth is not None and (not is_count(depth) or not 1 <= depth <= MinimaxAI.MAX_DEPTH):
+            response['error'] = f"depth must be from 1 to {MinimaxAI.MAX_DEPTH}"
+        elif time_ms is not None and (isinstance(time_ms, bool) or not isinstance(time_ms, (int, float))
+                                      or not math.isfinite(time_ms) or time_ms <= 0):
+            response['error'] = "time_ms must be a positive number"
+        elif 'positions' in request:
+            specs = request['positions']
+            if not isinstance(specs, list):
+                response['error'] = "positions must be a list"
+            else:
+                response['results'] = await asyncio.gather(*(self.search(spec, depth, time_ms) for spec in specs))
+        elif 'position' in request:
+            response.update(await self.search(request['position'], depth, time_ms))
+        else:
+            response['error'] = "request has no position"
+        return response
+
+    async def handle(self, reader, writer):
+        """Serve one client connection until it closes"""
+        lock = asyncio.Lock()
+        tasks = set()
+
+        async def answer(line):
+            response = await self.respond(line)
+            async with lock:
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    task = asyncio.create_task(answer(line))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=7878):
+        """Accept connections until cancelled"""
+        # Start every worker, loading its tables, before the first request arrives
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, abs, 0) for _ in range(self.workers)))
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve position analysis as line-delimited JSON over TCP")
+    parser.add_argument('--host', default='127.0.0.1', help="Address to listen on")
+    parser.add_argument('--port', type=int, default=7878, help="Port to listen on")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--tt-size-mb', type=int, default=16, help="Transposition table size per worker")
+    parser.add_argument('--time-ms', type=int, default=1000, help="Search time of requests without a budget")
+    parser.add_argument('--max-time-ms', type=int, default=60000, help="Longest any search may run")
+    args = parser.parse_args()
+
+    endgame_path = ENDGAME_DATABASE if os.path.exists(ENDGAME_DATABASE) else None
+    book_path = OPENING_BOOK if os.path.exists(OPENING_BOOK) else None
+    server = AnalysisServer(args.workers, args.tt_size_mb, endgame_path, book_path, args.time_ms, args.max_time_ms)
+    print(f"Listening on {args.host}:{args.port} with {server.workers} workers")
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Headless engine-vs-engine matches
+
+Plays N games between two MinimaxAI configurations on a process pool and appends one
+JSON line per finished game to the output file. An engine configuration is a dict with
+any of 'depth', 'time_ms', 'weights' (see main.EVALUATION_WEIGHTS), 'tt_size_mb',
+'quiescence_nodes' (0 turns the quiescence search off) and 'eval_cache_mb' (0 turns the
+evaluation cache off). It must give a 'depth' or a 'time_ms', or both.
+
+Games come in pairs that share a random opening, with the engines swapping colours, so
+neither side profits from a lucky opening. A game is drawn when a position repeats three
+times or after max_plies turns.
+
+Moves are written as squares a1..g7 (column from x, row from y): 'd2' places a piece,
+'a1-a4' moves one and a suffix like 'xd7' names the piece removed.
+
+    python arena.py --games 100 --a '{"depth": 3}' --b '{"depth": 4}' --out match.jsonl
+"""
+import argparse
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from main import EVALUATION_WEIGHTS, NO_SQUARE, SQUARE_INDEX, Game, MinimaxAI, encode_move, move_notation
+
+
+def turn_from_best_move(best_move):
+    """Encoded turn of a (move, removal) pair returned by MinimaxAI.get_best_move"""
+    move, removal = best_move
+    if move is None:
+        return encode_move(NO_SQUARE, NO_SQUARE, SQUARE_INDEX[removal])
+    source = NO_SQUARE if move[0] == 'place' else SQUARE_INDEX[move[1:3]]
+    target = SQUARE_INDEX[move[-2:]]
+    return encode_move(source, target, NO_SQUARE if removal is None else SQUARE_INDEX[removal])
+
+
+def check_config(config):
+    """Raise ValueError unless config gives the engine a depth or a time budget"""
+    if not isinstance(config, dict):
+        raise ValueError(f"engine configuration {config!r} is not an object")
+    if config.get('depth') is None and config.get('time_ms') is None:
+        raise ValueError(f"engine configuration {config} needs a 'depth' or a 'time_ms'")
+
+
+def make_engine(game, config):
+    """MinimaxAI for game built from an engine configuration"""
+    return MinimaxAI(game, config.get('tt_size_mb', 16), weights=config.get('weights', EVALUATION_WEIGHTS),
+                     quiescence_nodes=config.get('quiescence_nodes', MinimaxAI.QUIESCENCE_NODES),
+                     eval_cache_mb=config.get('eval_cache_mb', 4))
+
+
+def play_game(number, configs, a_is_white, opening_plies, seed, max_plies):
+    """Play one game and return its record
+
+    configs is the (A, B) pair of engine configurations. The first opening_plies turns are
+    drawn at random from seed.
+    """
+    rng = random.Random(seed)
+    game = Game()
+    game.start()
+    white, black = configs if a_is_white else configs[::-1]
+    engines = (make_engine(game, white), make_engine(game, black))
+    settings = (white, black)
+    moves = []
+    nodes = []
+    times_ms = []
+    seen = {}
+    result = None
+    reason = None
+
+    while result is None:
+        game_over, winner = game.is_game_over()
+        if game_over:
+            result = '1-0' if winner == 'W' else '0-1'
+            reason = 'win'
+            break
+        if len(moves) >= max_plies:
+            result, reason = '1/2-1/2', 'move limit'
+            break
+        if len(moves) < opening_plies:
+            turn = rng.choice(game.get_valid_turns())
+            nodes.append(0)
+            times_ms.append(0.0)
+        else:
+            engine = engines[game.side]
+            config = settings[game.side]
+            best_move = engine.get_best_move(depth=config.get('depth'), time_ms=config.get('time_ms'))
+            turn = turn_from_best_move(best_move)
+            nodes.append(engine.nodes)
+            times_ms.append(round(engine.elapsed * 1000, 2))
+        moves.append(move_notation(turn))
+        game.make_move(turn)
+        if not game.is_placement_phase():
+            seen[game.key] = seen.get(game.key, 0) + 1
+            if seen[game.key] >= 3:
+                result, reason = '1/2-1/2', 'repetition'
+
+    if result == '1/2-1/2':
+        winner = None
+    else:
+        winner = 'A' if (result == '1-0') == a_is_white else 'B'
+    return {
+        'game': number,
+        'white': 'A' if a_is_white else 'B',
+        'result': result,
+        'winner': winner,
+        'reason': reason,
+        'plies': len(moves),
+        'opening_plies': opening_plies,
+        'moves': ' '.join(moves),
+        'nodes': nodes,
+        'times_ms': times_ms,
+    }
+
+
+def elo_difference(score):
+    """Elo difference of a player scoring this fraction of the points"""
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def summarize(records, seconds):
+    """Match summary from the A engine's point of view: results, Elo estimate and throughput
+
+    The Elo margin is a 95% interval from the standard error of the per-game score.
+    """
+    games = len(records)
+    wins = sum(1 for record in records if record['winner'] == 'A')
+    losses = sum(1 for record in records if record['winner'] == 'B')
+    draws = games - wins - losses
+    points = [1.0 if record['winner'] == 'A' else 0.0 if record['winner'] == 'B' else 0.5 for record in records]
+    score = sum(points) / games if games else 0.5
+    deviation = math.sqrt(sum((point - score) ** 2 for point in points) / games) if games else 0.0
+    margin = 1.96 * deviation / math.sqrt(games) if games else 0.0
+    searched = [(n, t) for record in records
+                for n, t in zip(record['nodes'][record['opening_plies']:], record['times_ms'][record['opening_plies']:])]
+    return {
+        'games': games,
+        'wins': wins,
+        'draws': draws,
+        'losses': losses,
+        'score': score,
+        'elo': elo_difference(score),
+        'elo_low': elo_difference(score - margin),
+        'elo_high': elo_difference(score + margin),
+        'games_per_hour': games / seconds * 3600 if seconds > 0 else 0.0,
+        'nodes_per_move': sum(n for n, _ in searched) / len(searched) if searched else 0.0,
+        'ms_per_move': sum(t for _, t in searched) / len(searched) if searched else 0.0,
+    }
+
+
+def run_match(configs, games, out, opening_plies=4, seed=0, max_plies=300, workers=None):
+    """Play games between configs[0] (A) and configs[1] (B) and stream records to out
+
+    Returns the list of records, in the order they finished, and the summary.
+    """
+    for config in configs:
+        check_config(config)
+    workers = workers or os.cpu_count() or 1
+    records = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor, open(out, 'a') as f:
+        jobs = [executor.submit(play_game, number, configs, number % 2 == 0, opening_plies,
+                                seed * 1000003 + number // 2, max_plies)
+                for number in range(games)]
+        for job in as_completed(jobs):
+            record = job.result()
+            records.append(record)
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+    return records, summarize(records, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play engine-vs-engine games between two MinimaxAI settings")
+    parser.add_argument('--games', type=int, default=100, help="Number of games, colours alternating")
+    parser.add_argument('--a', default='{"depth": 3}', help="JSON configuration of engine A")
+    parser.add_argument('--b', default='{"depth": 3}', help="JSON configuration of engine B")
+    parser.add_argument('--opening', type=int, default=4, help="Random turns at the start of each game pair")
+    parser.add_argument('--max-plies', type=int, default=300, help="Turns before a game is drawn")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the random openings")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--out', default='arena.jsonl', help="JSONL file the game records are appended to")
+    args = parser.parse_args()
+
+    configs = (json.loads(args.a), json.loads(args.b))
+    for config in configs:
+        try:
+            check_config(config)
+        except ValueError as error:
+            parser.error(str(error))
+    records, summary = run_match(configs, args.games, args.out, args.opening, args.seed, args.max_plies,
+                                 args.workers)
+    print(f"A {configs[0]} vs B {configs[1]}")
+    print(f"+{summary['wins']} ={summary['draws']} -{summary['losses']} "
+          f"({summary['score']:.1%}), Elo {summary['elo']:+.0f} "
+          f"[{summary['elo_low']:+.0f}, {summary['elo_high']:+.0f}]")
+    print(f"{summary['games_per_hour']:.0f} games/hour, {summary['nodes_per_move']:.0f} nodes "
+          f"and {summary['ms_per_move']:.1f} ms per searched move")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Vectorized evaluation of many positions at once
+
+Scores positions with the same terms and weights as Game.evaluate_position, for N
+positions per call. Requires numpy.
+
+Positions are an (N, 24) int8 array indexed like main.SQUARES, holding 0 for empty,
+1 for white and 2 for black, together with the side to move (0 white, 1 black) and
+the pieces each side still has in hand as an (N, 2) array.
+"""
+import numpy as np
+
+from main import ADJACENT_MASKS, EVALUATION_WEIGHTS, MILL_MASKS, SQUARES
+
+SQUARE_COUNT = len(SQUARES)
+
+# Incidence matrices: (24, 16) square on mill and (24, 24) adjacency. They are float32 so
+# the per-mill counts and neighbour tests run as BLAS matrix products
+MILL_MATRIX = np.array([[mask >> square & 1 for mask in MILL_MASKS] for square in range(SQUARE_COUNT)],
+                       dtype=np.float32)
+ADJACENCY_MATRIX = np.array([[mask >> square & 1 for square in range(SQUARE_COUNT)] for mask in ADJACENT_MASKS],
+                            dtype=np.float32)
+SQUARE_BITS = np.arange(SQUARE_COUNT, dtype=np.uint32)
+
+
+def unpack_bitboards(white, black):
+    """Build the (N, 24) board array from packed white and black occupancy masks"""
+    white = np.asarray(white, dtype=np.uint32)[:, None] >> SQUARE_BITS & 1
+    black = np.asarray(black, dtype=np.uint32)[:, None] >> SQUARE_BITS & 1
+    return (white + 2 * black).astype(np.int8)
+
+
+def in_hand_from_placed(placed):
+    """(N, 2) pieces left to place for white and black, given Game.placed for each position"""
+    placed = np.asarray(placed, dtype=np.int8)
+    return np.stack([9 - (placed + 1) // 2, 9 - placed // 2], axis=1)
+
+
+def encode_games(games):
+    """Board, side-to-move and pieces-in-hand arrays for a sequence of Game objects"""
+    white = [game.bitboards[0] for game in games]
+    black = [game.bitboards[1] for game in games]
+    sides = np.array([game.side for game in games], dtype=np.int8)
+    return unpack_bitboards(white, black), sides, in_hand_from_placed([game.placed for game in games])
+
+
+def evaluate_terms(boards, sides, in_hand):
+    """Per-position evaluation terms, each an array of length N
+
+    Returns a dict with the piece counts, completed mills, open two-in-a-rows, mobility
+    (empty squares each side can reach), blocked status and game-over result (1 white
+    wins, -1 black wins, 0 undecided), plus the can_* flags used by the score.
+    """
+    boards = np.asarray(boards, dtype=np.int8)
+    sides = np.asarray(sides)
+    placement = np.asarray(in_hand).sum(axis=1) > 0
+    white = boards == 1
+    black = boards == 2
+    empty = boards == 0
+    white_float = white.astype(np.float32)
+    black_float = black.astype(np.float32)
+    white_pieces = white.sum(axis=1)
+    black_pieces = black.sum(axis=1)
+
+    # Piece counts on every mill line
+    white_lines = white_float @ MILL_MATRIX
+    black_lines = black_float @ MILL_MATRIX
+    white_open = (white_lines == 2) & (black_lines == 0)
+    black_open = (black_lines == 2) & (white_lines == 0)
+    white_gaps = ((white_open.astype(np.float32) @ MILL_MATRIX.T) > 0) & empty
+    black_gaps = ((black_open.astype(np.float32) @ MILL_MATRIX.T) > 0) & empty
+
+    # Empty squares each side can reach: anywhere while placing or flying, else a neighbour
+    white_near = (white_float @ ADJACENCY_MATRIX) > 0
+    black_near = (black_float @ ADJACENCY_MATRIX) > 0
+    white_free = placement | ((white_pieces > 0) & (white_pieces <= 3))
+    black_free = placement | ((black_pieces > 0) & (black_pieces <= 3))
+    white_reach = empty & (white_near | white_free[:, None])
+    black_reach = empty & (black_near | black_free[:, None])
+    white_mobility = white_reach.sum(axis=1)
+    black_mobility = black_reach.sum(axis=1)
+
+    white_blocked = ~placement & (white_mobility == 0)
+    black_blocked = ~placement & (black_mobility == 0)
+    mover_blocked = np.where(sides == 0, white_blocked, black_blocked)
+    result = np.zeros(len(boards), dtype=np.int8)
+    result[~placement & mover_blocked] = np.where(sides == 0, -1, 1)[~placement & mover_blocked]
+    result[~placement & (black_pieces < 3)] = 1
+    result[~placement & (white_pieces < 3)] = -1
+
+    both_low = (white_pieces <= 3) & (black_pieces <= 3)
+    return {
+        'white_pieces': white_pieces,
+        'black_pieces': black_pieces,
+        'white_mills': (white_lines == 3).sum(axis=1),
+        'black_mills': (black_lines == 3).sum(axis=1),
+        'white_twos': white_open.sum(axis=1),
+        'black_twos': black_open.sum(axis=1),
+        'white_mobility': white_mobility,
+        'black_mobility': black_mobility,
+        'white_blocked': white_blocked,
+        'black_blocked': black_blocked,
+        'result': result,
+        'white_prevents_loss': both_low | white_blocked,
+        'black_prevents_loss': both_low | black_blocked,
+        'white_creates_mill': (white_gaps & white_reach).any(axis=1),
+        'black_creates_mill': (black_gaps & black_reach).any(axis=1),
+        'white_blocks_mill': (black_gaps & white_reach).any(axis=1),
+        'black_blocks_mill': (white_gaps & black_reach).any(axis=1),
+    }
+
+
+def evaluate_batch(boards, sides, in_hand, weights=EVALUATION_WEIGHTS):
+    """Game.evaluate_position for every position, as an int64 array of length N"""
+    terms = evaluate_terms(boards, sides, in_hand)
+    prevent_loss, create_mill, block_mill, mill, two = weights
+    score = np.zeros(len(terms['result']), dtype=np.int64)
+    score += prevent_loss * (terms['white_prevents_loss'].astype(np.int64) - terms['black_prevents_loss'])
+    score += create_mill * (terms['white_creates_mill'].astype(np.int64) - terms['black_creates_mill'])
+    score += block_mill * (terms['white_blocks_mill'].astype(np.int64) - terms['black_blocks_mill'])
+    score += mill * (terms['white_mills'] - terms['black_mills'])
+    score += two * (terms['white_twos'] - terms['black_twos'])
+    return np.where(terms['result'] != 0, 1000000 * terms['result'].astype(np.int64), score)
+
+
+def evaluate_children(game):
+    """Encoded turns of the current player and the evaluation after each of them"""
+    turns = game.get_valid_turns()
+    white, black, sides, placed = [], [], [], []
+    for turn in turns:
+        game.make_move(turn)
+        white.append(game.bitboards[0])
+        black.append(game.bitboards[1])
+        sides.append(game.side)
+        placed.append(game.placed)
+        game.unmake_move()
+    return turns, evaluate_batch(unpack_bitboards(white, black), sides, in_hand_from_placed(placed))
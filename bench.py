@@ -0,0 +1,215 @@
+"""Benchmarks of the Game primitives and the search on fixed positions
+
+Times move generation, mill checks, evaluation, removal with undo, perft and a fixed-depth
+search over placement, movement and flying positions. Each benchmark reports operations
+per second, nodes per second where it searches, and the peak Python memory of one run
+(tracemalloc, measured on a separate run so it does not slow the timing).
+
+Results are written as JSON. Given a baseline file written by an earlier run, any rate
+that drops, or peak memory that grows, by more than the threshold is reported and the
+exit status is 1.
+
+    python bench.py --save-baseline bench_baseline.json
+    python bench.py --baseline bench_baseline.json --threshold 0.15
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+from main import SQUARES, MinimaxAI
+from perft import load, perft
+
+# Game.position() tuples: white and black bitboards, pieces placed, side, pending removal
+POSITIONS = {
+    'placement': (1118210, 543232, 8, 0, False),
+    'movement': (10719234, 544312, 18, 1, False),
+    'flying': (8521728, 3145785, 18, 0, False),
+}
+# Positions with a removal pending and the (x, y) of the piece to remove
+REMOVAL_POSITIONS = {
+    'placement': ((9506818, 544256, 10, 1, True), (5, 5)),
+    'movement': ((10719234, 4214328, 18, 1, True), (3, 4)),
+}
+
+
+# Each benchmark takes its argument and returns (operations, nodes) for one run
+
+def bench_get_valid_moves(games):
+    for game in games:
+        game.get_valid_moves()
+    return len(games), 0
+
+
+def bench_get_valid_turns(games):
+    for game in games:
+        game.get_valid_turns()
+    return len(games), 0
+
+
+def bench_check_mill(games):
+    count = 0
+    for game in games:
+        for x, y in SQUARES:
+            game.check_mill(x, y)
+        count += len(SQUARES)
+    return count, 0
+
+
+def bench_evaluate_position(games):
+    for game in games:
+        game.evaluate_position()
+    return len(games), 0
+
+
+def bench_remove_piece_undo(cases):
+    for game, (x, y) in cases:
+        game.remove_piece(x, y)
+        game.undo()
+    return len(cases), 0
+
+
+def make_perft_bench(depth):
+    def bench_perft(games):
+        nodes = sum(perft(game, depth) for game in games)
+        return len(games), nodes
+    return bench_perft
+
+
+def make_search_bench(depth):
+    def bench_search(engines):
+        nodes = 0
+        for ai in engines:
+            ai.get_best_move(depth=depth)
+            nodes += ai.nodes
+        return len(engines), nodes
+    return bench_search
+
+
+def clear_engines(engines):
+    """Empty the tables of engines built once, so each run searches from scratch"""
+    for ai in engines:
+        ai.tt.clear()
+        if ai.eval_cache is not None:
+            ai.eval_cache.clear()
+
+
+def measure(function, argument, min_seconds, rounds=5, setup=None):
+    """Time function on argument; return ops/s, nodes/s, peak KB and the total time
+
+    The time is split into rounds and the fastest round is reported, which keeps the
+    figures steady when other work shares the machine. setup, if given, is called on
+    argument before every run, outside the timing and the memory measurement.
+    """
+    best = None
+    total = 0.0
+    for _ in range(rounds):
+        operations = nodes = 0
+        elapsed = 0.0
+        while elapsed < min_seconds / rounds:
+            if setup is not None:
+                setup(argument)
+            start = time.perf_counter()
+            run_operations, run_nodes = function(argument)
+            elapsed += time.perf_counter() - start
+            operations += run_operations
+            nodes += run_nodes
+        total += elapsed
+        if best is None or operations / elapsed > best[0] / best[2]:
+            best = (operations, nodes, elapsed)
+    if setup is not None:
+        setup(argument)
+    tracemalloc.start()
+    function(argument)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    operations, nodes, elapsed = best
+    result = {'ops_per_sec': operations / elapsed, 'peak_kb': peak / 1024, 'seconds': total}
+    if nodes:
+        result['nodes_per_sec'] = nodes / elapsed
+    return result
+
+
+def run_benchmarks(min_seconds=1.0, perft_depth=3, search_depth=4):
+    """Run every benchmark and return the results document"""
+    games = [load(position) for position in POSITIONS.values()]
+    removal_cases = [(load(position), square) for position, square in REMOVAL_POSITIONS.values()]
+    engines = [MinimaxAI(load(position), tt_size_mb=4) for position in POSITIONS.values()]
+    benchmarks = [
+        ('get_valid_moves', bench_get_valid_moves, games),
+        ('get_valid_turns', bench_get_valid_turns, games),
+        ('check_mill', bench_check_mill, games),
+        ('evaluate_position', bench_evaluate_position, games),
+        ('remove_piece_undo', bench_remove_piece_undo, removal_cases),
+        (f'perft_{perft_depth}', make_perft_bench(perft_depth), games),
+    ]
+    results = {name: measure(function, argument, min_seconds) for name, function, argument in benchmarks}
+    results[f'search_depth_{search_depth}'] = measure(make_search_bench(search_depth), engines, min_seconds,
+                                                      setup=clear_engines)
+    document = {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'benchmarks': results,
+    }
+    if resource is not None:
+        document['max_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return document
+
+
+def compare(results, baseline, threshold):
+    """Messages for every metric that regressed against baseline by more than threshold"""
+    regressions = []
+    for name, metrics in baseline['benchmarks'].items():
+        current = results['benchmarks'].get(name)
+        if current is None:
+            continue
+        for metric in ('ops_per_sec', 'nodes_per_sec'):
+            if metric in metrics and current.get(metric, 0) < metrics[metric] * (1 - threshold):
+                regressions.append(f"{name} {metric}: {current.get(metric, 0):,.0f} < {metrics[metric]:,.0f}")
+        if current['peak_kb'] > metrics['peak_kb'] * (1 + threshold):
+            regressions.append(f"{name} peak_kb: {current['peak_kb']:,.1f} > {metrics['peak_kb']:,.1f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the game primitives and the search")
+    parser.add_argument('--out', default='bench_results.json', help="JSON file for the results")
+    parser.add_argument('--baseline', help="Results file to compare against")
+    parser.add_argument('--save-baseline', help="Also write the results to this baseline file")
+    parser.add_argument('--threshold', type=float, default=0.15, help="Allowed relative regression")
+    parser.add_argument('--seconds', type=float, default=1.0, help="Minimum time per benchmark")
+    parser.add_argument('--perft-depth', type=int, default=3, help="Depth of the perft benchmark")
+    parser.add_argument('--search-depth', type=int, default=4, help="Depth of the search benchmark")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.seconds, args.perft_depth, args.search_depth)
+    for name, metrics in results['benchmarks'].items():
+        line = f"{name:<20} {metrics['ops_per_sec']:>14,.0f} ops/s"
+        if 'nodes_per_sec' in metrics:
+            line += f" {metrics['nodes_per_sec']:>12,.0f} nodes/s"
+        print(f"{line:<58} peak {metrics['peak_kb']:>9,.1f} KB")
+    for path in (args.out, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regression beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+"""Retrograde solver for movement- and flying-phase endgames
+
+Positions are grouped into classes (m, o): the side to move (the mover) has m pieces and
+its opponent o pieces, all pieces placed. Colours do not matter once placement is over,
+so one class covers both white and black to move. Classes are solved in order of total
+piece count: a capture leads to a class with one piece fewer, which is already solved,
+while ordinary moves stay within the pair of classes (m, o) and (o, m), which are
+solved together.
+
+Positions are indexed up to the 16 board symmetries (see symmetry.py), which cuts each
+class to about a sixteenth. Each class is stored twice: as an array('H') with one value
+per index, 0 a draw, 2 * d + 1 a win for the mover in d turns and 2 * d + 2 a loss in d
+turns, and as a packed file of 2-bit results (four per byte) for probing.
+
+    python endgame.py --max-pieces 4 --out endgame_db --workers 8
+"""
+import argparse
+import os
+import time
+from array import array
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from math import comb
+
+from main import ADJACENT_MASKS, FULL_MASK, MILL_PARTNERS, NO_SQUARE, SQUARES, Game
+from symmetry import SYMMETRIES, canonicalize, stabilizer, transform
+
+SQUARE_COUNT = len(SQUARES)
+DRAW = 0
+UNUSED = 255  # Count of an index whose slot holds a non-canonical position
+
+# 2-bit results of the packed tables
+RESULT_DRAW = 0
+RESULT_WIN = 1
+RESULT_LOSS = 2
+
+# Colex ranking: the k-th smallest square s of a subset contributes comb(s, k)
+BINOMIALS = tuple(tuple(comb(n, k) for k in range(SQUARE_COUNT + 1)) for n in range(SQUARE_COUNT + 1))
+
+
+# m -> (canonical mover sets in increasing order, {set: rank}, {rank: stabilizer})
+_mover_classes = {}
+
+
+def mover_classes(m):
+    """Canonical sets of m mover squares, one per symmetry class, with ranks and stabilizers
+
+    A set is canonical when no symmetry maps it to a smaller bitboard. Built on first use
+    and kept for the life of the process.
+    """
+    if m not in _mover_classes:
+        representatives = []
+        for squares in combinations(range(SQUARE_COUNT), m):
+            mask = sum(1 << square for square in squares)
+            if all(transform(mask, symmetry) >= mask for symmetry in range(1, len(SYMMETRIES))):
+                representatives.append(mask)
+        representatives.sort()
+        ranks = {mask: rank for rank, mask in enumerate(representatives)}
+        stabilizers = {}
+        for rank, mask in enumerate(representatives):
+            symmetries = stabilizer(mask)
+            if symmetries:
+                stabilizers[rank] = symmetries
+        _mover_classes[m] = (representatives, ranks, stabilizers)
+    return _mover_classes[m]
+
+
+def class_size(m, o):
+    """Number of indexes in class (m, o)"""
+    return len(mover_classes(m)[0]) * comb(SQUARE_COUNT - m, o)
+
+
+def win_value(distance):
+    """Stored value of a win for the mover in distance turns"""
+    return 2 * distance + 1
+
+
+def loss_value(distance):
+    """Stored value of a loss for the mover in distance turns"""
+    return 2 * distance + 2
+
+
+def decode_value(value):
+    """(result, distance) for a stored value, result being 'win', 'loss' or 'draw' for the mover"""
+    if value == DRAW:
+        return 'draw', None
+    return ('win' if value & 1 else 'loss'), (value - 1) >> 1
+
+
+def unrank_subset(rank, size):
+    """Sorted indices of the subset with the given colex rank"""
+    squares = []
+    candidate = SQUARE_COUNT - 1
+    for k in range(size, 0, -1):
+        while BINOMIALS[candidate][k] > rank:
+            candidate -= 1
+        squares.append(candidate)
+        rank -= BINOMIALS[candidate][k]
+        candidate -= 1
+    squares.reverse()
+    return squares
+
+
+def squares_of(mask):
+    """Sorted square indices of the bits set in mask"""
+    squares = []
+    while mask:
+        low = mask & -mask
+        squares.append(low.bit_length() - 1)
+        mask ^= low
+    return squares
+
+
+def position_index(mover, opponent):
+    """Index of a position within its class, shared by all of its symmetric images
+
+    The position is first canonicalized. Its mover set then gives the rank among the
+    canonical mover sets and the opponent's squares are ranked among the squares the mover
+    leaves free.
+    """
+    mover, opponent, _ = canonicalize(mover, opponent)
+    m = mover.bit_count()
+    return mover_classes(m)[1][mover] * BINOMIALS[SQUARE_COUNT - m][opponent.bit_count()] + opponent_rank(mover, opponent)
+
+
+def opponent_rank(mover, opponent):
+    """Colex rank of the opponent's squares among the squares the mover leaves free"""
+    rank = 0
+    k = 1
+    rest = opponent
+    while rest:
+        low = rest & -rest
+        # Slot of the square among the squares not taken by the mover
+        rank += BINOMIALS[low.bit_length() - 1 - (mover & low - 1).bit_count()][k]
+        k += 1
+        rest ^= low
+    return rank
+
+
+def position_at(index, m, o):
+    """The (mover, opponent) bitboards stored at index in class (m, o)
+
+    Inverse of position_index for canonical positions. When the mover set is itself
+    symmetric, some slots hold a non-canonical position that no index refers to; see
+    is_canonical.
+    """
+    mover_rank, opponent_rank = divmod(index, comb(SQUARE_COUNT - m, o))
+    mover = mover_classes(m)[0][mover_rank]
+    free = [square for square in range(SQUARE_COUNT) if not mover >> square & 1]
+    opponent = 0
+    for slot in unrank_subset(opponent_rank, o):
+        opponent |= 1 << free[slot]
+    return mover, opponent
+
+
+def is_canonical(index, m, o):
+    """Whether the slot at index holds the canonical form of its position"""
+    mover_rank = index // comb(SQUARE_COUNT - m, o)
+    symmetries = mover_classes(m)[2].get(mover_rank)
+    if not symmetries:
+        return True
+    _, opponent = position_at(index, m, o)
+    return all(transform(opponent, symmetry) >= opponent for symmetry in symmetries)
+
+
+def pack_results(values):
+    """2-bit results of a solved class, four per byte, lowest index in the low bits"""
+    packed = bytearray((len(values) + 3) // 4)
+    for index, value in enumerate(values):
+        if value != DRAW:
+            packed[index >> 2] |= (RESULT_WIN if value & 1 else RESULT_LOSS) << (index & 3) * 2
+    return packed
+
+
+def packed_result(packed, index):
+    """RESULT_DRAW, RESULT_WIN or RESULT_LOSS for the mover at index of a packed class"""
+    return packed[index >> 2] >> (index & 3) * 2 & 3
+
+
+def class_path(directory, m, o):
+    """File holding the solved values of class (m, o)"""
+    return os.path.join(directory, f"endgame_{m}_{o}.bin")
+
+
+def results_path(directory, m, o):
+    """File holding the packed 2-bit results of class (m, o)"""
+    return os.path.join(directory, f"endgame_{m}_{o}.wdl")
+
+
+def load_class(directory, m, o):
+    """Solved values of class (m, o) from directory"""
+    values = array('H')
+    with open(class_path(directory, m, o), 'rb') as f:
+        values.fromfile(f, class_size(m, o))
+    return values
+
+
+def save_class(directory, m, o, values):
+    """Write a solved class atomically, so an interrupted run never leaves a partial file"""
+    path = class_path(directory, m, o)
+    with open(path + '.tmp', 'wb') as f:
+        values.tofile(f)
+    os.replace(path + '.tmp', path)
+    path = results_path(directory, m, o)
+    with open(path + '.tmp', 'wb') as f:
+        f.write(pack_results(values))
+    os.replace(path + '.tmp', path)
+
+
+def load_results(directory, m, o):
+    """Packed 2-bit results of class (m, o), read with packed_result"""
+    with open(results_path(directory, m, o), 'rb') as f:
+        return bytearray(f.read())
+
+
+# Worker side. Each process keeps the lower classes it has read, keyed by (directory, m, o)
+_loaded_classes = {}
+
+
+def _lower_class(directory, m, o):
+    if (directory, m, o) not in _loaded_classes:
+        _loaded_classes.clear()  # Only one lower class is needed at a time
+        _loaded_classes[(directory, m, o)] = load_class(directory, m, o)
+    return _loaded_classes[(directory, m, o)]
+
+
+def initial_counts(directory, m, o, start, stop):
+    """Scan positions start..stop of class (m, o) before propagation
+
+    Moves follow Game.get_valid_turns, so flying and the mill-protection rule for removals
+    are exactly the game's. Returns, per position, the number of children still to be
+    resolved (distinct children of ordinary moves, plus one that never resolves if a
+    capture wins or draws), the quickest capture win and the slowest capture loss, each 0
+    if there is none. Non-canonical slots get the count UNUSED.
+    """
+    game = Game()
+    lower = _lower_class(directory, o - 1, m) if o > 3 else None
+    counts = bytearray(stop - start)
+    quickest_wins = array('H', bytes(2 * (stop - start)))
+    slowest_losses = array('H', bytes(2 * (stop - start)))
+
+    for offset, index in enumerate(range(start, stop)):
+        if not is_canonical(index, m, o):
+            counts[offset] = UNUSED
+            continue
+        mover, opponent = position_at(index, m, o)
+        game.set_position((mover, opponent, 18, 0, False))  # Also sets the mill counts removals read
+        children = set()
+        quickest_win = 0
+        slowest_loss = 0
+        unresolved_capture = False
+        for turn in game.get_valid_turns():
+            removal = turn >> 10
+            source = turn & 31
+            target = turn >> 5 & 31
+            if removal == NO_SQUARE:
+                # Symmetric moves reach the same index, which is counted once
+                children.add(position_index(opponent, mover ^ (1 << source | 1 << target)))
+                continue
+            if lower is None:
+                quickest_win = 1  # The opponent drops to two pieces
+                continue
+            child_mover = opponent ^ 1 << removal
+            child_opponent = mover ^ (1 << source | 1 << target)
+            value = lower[position_index(child_mover, child_opponent)]
+            if value == DRAW:
+                unresolved_capture = True
+            elif value & 1:
+                slowest_loss = max(slowest_loss, ((value - 1) >> 1) + 1)
+            elif not quickest_win or ((value - 1) >> 1) + 1 < quickest_win:
+                quickest_win = ((value - 1) >> 1) + 1
+        counts[offset] = len(children) + (1 if quickest_win or unresolved_capture else 0)
+        quickest_wins[offset] = quickest_win
+        slowest_losses[offset] = slowest_loss
+    return start, counts, quickest_wins, slowest_losses
+
+
+def predecessors(m, o, indexes):
+    """Positions of class (o, m) with an ordinary move into each given position of class (m, o)
+
+    The opponent in the child made the last move: one of its pieces went from an empty
+    square s to its square t, adjacent unless it was flying. Moves that close a mill are
+    captures and lead elsewhere, so t must not complete one of its mills. Each parent index
+    is listed once per child, matching the distinct children counted by initial_counts.
+    """
+    found = []
+    for index in indexes:
+        mover, opponent = position_at(index, m, o)
+        empty = FULL_MASK & ~(mover | opponent)
+        flying = o <= 3
+        parents = set()
+        for target in squares_of(opponent):
+            first, second = MILL_PARTNERS[target]
+            if opponent & first == first or opponent & second == second:
+                continue
+            sources = empty if flying else ADJACENT_MASKS[target] & empty
+            for source in squares_of(sources):
+                parents.add(position_index(opponent ^ (1 << target | 1 << source), mover))
+        found.append(parents)
+    return found
+
+
+# Coordinator side
+
+def solve_pair(directory, m, o, executor, workers):
+    """Solve classes (m, o) and (o, m) together and save them"""
+    classes = [(m, o)] if m == o else [(m, o), (o, m)]
+    values = {}
+    counts = {}
+    slowest_losses = {}
+    buckets = defaultdict(list)  # distance -> [(class, index, is_win)]
+
+    for cls in classes:
+        size = class_size(*cls)
+        values[cls] = array('H', bytes(2 * size))
+        counts[cls] = bytearray(size)
+        slowest_losses[cls] = array('H', bytes(2 * size))
+        chunk = max(1, size // (workers * 8))
+        jobs = [executor.submit(initial_counts, directory, cls[0], cls[1], start, min(start + chunk, size))
+                for start in range(0, size, chunk)]
+        for job in jobs:
+            start, chunk_counts, chunk_wins, chunk_losses = job.result()
+            counts[cls][start:start + len(chunk_counts)] = chunk_counts
+            slowest_losses[cls][start:start + len(chunk_losses)] = chunk_losses
+            for offset, count in enumerate(chunk_counts):
+                if chunk_wins[offset]:
+                    buckets[chunk_wins[offset]].append((cls, start + offset, True))
+                elif not count:
+                    # Blocked (distance 0) or every move is a losing capture
+                    buckets[chunk_losses[offset]].append((cls, start + offset, False))
+
+    distance = 0
+    while buckets:
+        level = buckets.pop(distance, [])
+        resolved = defaultdict(lambda: ([], []))  # class -> (wins, losses)
+        for cls, index, is_win in level:
+            if values[cls][index] == DRAW:
+                values[cls][index] = win_value(distance) if is_win else loss_value(distance)
+                resolved[cls][0 if is_win else 1].append(index)
+
+        for cls, (wins, losses) in resolved.items():
+            parent_cls = (cls[1], cls[0])
+            parent_values = values[parent_cls]
+            parent_counts = counts[parent_cls]
+            parent_losses = slowest_losses[parent_cls]
+            for is_win, indexes in ((True, wins), (False, losses)):
+                chunk = max(1, len(indexes) // (workers * 4))
+                jobs = [executor.submit(predecessors, cls[0], cls[1], indexes[i:i + chunk])
+                        for i in range(0, len(indexes), chunk)]
+                for job in jobs:
+                    for parents in job.result():
+                        for parent in parents:
+                            if parent_values[parent] != DRAW:
+                                continue
+                            if not is_win:
+                                # Moving into a lost position wins
+                                buckets[distance + 1].append((parent_cls, parent, True))
+                                continue
+                            parent_counts[parent] -= 1
+                            if parent_losses[parent] < distance + 1:
+                                parent_losses[parent] = distance + 1
+                            if not parent_counts[parent]:
+                                buckets[parent_losses[parent]].append((parent_cls, parent, False))
+        distance += 1
+
+    for cls in classes:
+        save_class(directory, cls[0], cls[1], values[cls])
+    return {cls: summarize(values[cls], counts[cls]) for cls in classes}
+
+
+def summarize(values, counts):
+    """Win, loss and draw counts of a solved class and its longest forced result"""
+    wins = losses = draws = 0
+    longest = 0
+    for value, count in zip(values, counts):
+        if count == UNUSED:
+            continue
+        if value == DRAW:
+            draws += 1
+        else:
+            if value & 1:
+                wins += 1
+            else:
+                losses += 1
+            longest = max(longest, (value - 1) >> 1)
+    return {'wins': wins, 'losses': losses, 'draws': draws, 'longest': longest}
+
+
+def class_pairs(max_pieces):
+    """Class pairs (m, o) with m >= o in solving order"""
+    pairs = [(m, o) for m in range(3, max_pieces + 1) for o in range(3, m + 1)]
+    return sorted(pairs, key=lambda pair: (pair[0] + pair[1], pair))
+
+
+def solve(directory, max_pieces, workers=None):
+    """Solve every class up to max_pieces per side, skipping classes already on disk"""
+    os.makedirs(directory, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for m, o in class_pairs(max_pieces):
+            if all(os.path.exists(path(directory, *cls)) for path in (class_path, results_path)
+                   for cls in ((m, o), (o, m))):
+                print(f"Class {m}v{o} already solved, skipping")
+                continue
+            start = time.perf_counter()
+            summary = solve_pair(directory, m, o, executor, workers)
+            print(f"Solved {m}v{o} in {time.perf_counter() - start:.1f}s: {summary}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve movement-phase endgames by retrograde analysis")
+    parser.add_argument('--max-pieces', type=int, default=3, help="Largest piece count per side (3-9)")
+    parser.add_argument('--out', default='endgame_db', help="Directory for the class files")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    args = parser.parse_args()
+    solve(args.out, args.max_pieces, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Single-file database of solved endgame classes, read through a memory mapping
+
+Layout, all integers little-endian:
+
+    header       MAGIC, format version, number of classes, reserved (HEADER)
+    class table  one CLASS_ENTRY per class: m, o, bits per value, number of canonical
+                 mover sets, offset of the mover table, offset and length of the values
+    data         per class, the canonical mover sets of endgame.mover_classes as uint32
+                 in increasing order, then the values in endgame index order: 2-bit
+                 results packed four per byte, or the solver's uint16 values with distances
+
+Sections start on 8-byte boundaries. The reader maps the file and decodes single values in
+place, so opening is instant and processes on one host share the page cache. The mover
+tables stand in for the rank dictionaries the solver builds, which are slow to create for
+large classes. Readers assume a little-endian host.
+
+    python endgame_db.py endgame_db endgame.db --results-only
+"""
+import argparse
+import mmap
+import os
+import re
+import struct
+from array import array
+from bisect import bisect_left
+from math import comb
+
+from endgame import (SQUARE_COUNT, decode_value, load_class, mover_classes, opponent_rank,
+                     pack_results, packed_result)
+from symmetry import canonicalize
+
+MAGIC = b'MILLEGDB'
+VERSION = 1
+HEADER = struct.Struct('<8sHHI')
+CLASS_ENTRY = struct.Struct('<BBBxIQQQ')
+RESULT_BITS = 2  # Value widths of a class
+DISTANCE_BITS = 16
+RESULT_NAMES = ('draw', 'win', 'loss')  # By packed result
+
+
+def _aligned(offset):
+    return (offset + 7) & ~7
+
+
+def solved_classes(directory):
+    """Classes (m, o) with a solved value file in directory, in increasing order"""
+    classes = []
+    for name in os.listdir(directory):
+        match = re.fullmatch(r'endgame_(\d+)_(\d+)\.bin', name)
+        if match:
+            classes.append((int(match.group(1)), int(match.group(2))))
+    return sorted(classes)
+
+
+def write_database(path, directory, distances=True):
+    """Pack every class solved in directory into one database file at path
+
+    With distances the solver's 16-bit values are kept, otherwise only the 2-bit results,
+    which take an eighth of the space.
+    """
+    classes = solved_classes(directory)
+    entries = []
+    sections = []
+    offset = _aligned(HEADER.size + CLASS_ENTRY.size * len(classes))
+    for m, o in classes:
+        movers = array('I', mover_classes(m)[0])
+        values = load_class(directory, m, o)
+        data = values.tobytes() if distances else bytes(pack_results(values))
+        movers_offset = offset
+        values_offset = _aligned(movers_offset + len(movers) * movers.itemsize)
+        offset = _aligned(values_offset + len(data))
+        entries.append(CLASS_ENTRY.pack(m, o, DISTANCE_BITS if distances else RESULT_BITS, len(movers),
+                                        movers_offset, values_offset, len(data)))
+        sections.append((movers_offset, movers.tobytes()))
+        sections.append((values_offset, data))
+
+    with open(path + '.tmp', 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(classes), 0))
+        f.write(b''.join(entries))
+        for section_offset, data in sections:
+            f.write(bytes(section_offset - f.tell()))
+            f.write(data)
+    os.replace(path + '.tmp', path)
+    return classes
+
+
+class EndgameDatabase:
+    """Read-only view of a database file, decoding values on demand from the mapping"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, _ = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an endgame database")
+        if version != VERSION:
+            raise ValueError(f"{path} has format version {version}, expected {VERSION}")
+        self.entries = {}  # (m, o) -> (bits, mover count, mover table offset, values offset, values length)
+        for i in range(count):
+            m, o, *entry = CLASS_ENTRY.unpack_from(self.map, HEADER.size + i * CLASS_ENTRY.size)
+            self.entries[(m, o)] = tuple(entry)
+        self.views = {}  # (m, o) -> (bits, movers, values, stride), created on first probe
+
+    def close(self):
+        """Release the views and the mapping"""
+        for _, movers, values, _ in self.views.values():
+            movers.release()
+            values.release()
+        self.views.clear()
+        self.map.close()
+
+    def has_class(self, m, o):
+        """Whether class (m, o) is in the database"""
+        return (m, o) in self.entries
+
+    def class_view(self, m, o):
+        """Zero-copy views of the mover table and values of class (m, o)"""
+        bits, mover_count, movers_offset, values_offset, values_length = self.entries[(m, o)]
+        data = memoryview(self.map)
+        movers = data[movers_offset:movers_offset + 4 * mover_count].cast('I')
+        values = data[values_offset:values_offset + values_length]
+        if bits == DISTANCE_BITS:
+            values = values.cast('H')
+        data.release()
+        return bits, movers, values, comb(SQUARE_COUNT - m, o)
+
+    def probe(self, mover, opponent):
+        """(result, distance) for the side to move, as endgame.decode_value, or None if unsolved
+
+        mover and opponent are the bitboards of the side to move and the other side in the
+        movement phase. distance is None for draws and for databases without distances.
+        """
+        cls = (mover.bit_count(), opponent.bit_count())
+        view = self.views.get(cls)
+        if view is None:
+            if cls not in self.entries:
+                return None
+            view = self.views[cls] = self.class_view(*cls)
+        bits, movers, values, stride = view
+        mover, opponent, _ = canonicalize(mover, opponent)
+        index = bisect_left(movers, mover) * stride + opponent_rank(mover, opponent)
+        if bits == RESULT_BITS:
+            return RESULT_NAMES[packed_result(values, index)], None
+        return decode_value(values[index])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack solved endgame classes into one database file")
+    parser.add_argument('directory', help="Directory written by endgame.py")
+    parser.add_argument('out', help="Database file to write")
+    parser.add_argument('--results-only', action='store_true', help="Store 2-bit results without distances")
+    args = parser.parse_args()
+    classes = write_database(args.out, args.directory, distances=not args.results_only)
+    print(f"Wrote {len(classes)} classes to {args.out} ({os.path.getsize(args.out)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,106 +1,292 @@
-import copy
+import os
+import random
+import time
+from array import array
+from types import MappingProxyType
+
+# Board topology - read-only tables shared by every Game
+
+# Available positions (x, y) coordinates based on the image
+TILES = frozenset({
+    # Outer Square (8 nodes)
+    (0, 0), (0, 3), (0, 6),  # Top row
+    (3, 6), (6, 6), (6, 3), (6, 0), (3, 0),  # Right, bottom, left sides
+    
+    # Middle Square (8 nodes)
+    (1, 1), (1, 3), (1, 5),  # Top row
+    (3, 5), (5, 5), (5, 3), (5, 1), (3, 1),  # Right, bottom, left sides
+    
+    # Inner Square (8 nodes)
+    (2, 2), (2, 3), (2, 4),  # Top row
+    (3, 4), (4, 4), (4, 3), (4, 2), (3, 2)   # Right, bottom, left sides
+})
+
+# Define adjacency for each position based on the image
+# Only positions connected by lines are adjacent
+ADJACENCY = MappingProxyType({
+    # Outer Square (8 points) - corners and midpoints
+    (0, 0): ((0, 3), (3, 0)),  # Top-left corner
+    (0, 3): ((0, 0), (0, 6), (1, 3)),  # Top middle
+    (0, 6): ((0, 3), (3, 6)),  # Top-right corner
+    (3, 0): ((0, 0), (6, 0), (3, 1)),  # Left middle
+    (3, 6): ((0, 6), (6, 6), (3, 5)),  # Right middle
+    (6, 0): ((3, 0), (6, 3)),  # Bottom-left corner
+    (6, 3): ((6, 0), (6, 6), (5, 3)),  # Bottom middle
+    (6, 6): ((3, 6), (6, 3)),  # Bottom-right corner
+    
+    # Middle Square (8 points) - corners and midpoints
+    (1, 1): ((1, 3), (3, 1)),  # Inner top-left
+    (1, 3): ((0, 3), (1, 1), (1, 5), (2, 3)),  # Inner top middle
+    (1, 5): ((1, 3), (3, 5)),  # Inner top-right
+    (3, 1): ((1, 1), (3, 0), (3, 2), (5, 1)),  # Inner left middle
+    (3, 5): ((1, 5), (3, 6), (5, 5), (3, 4)),  # Inner right middle
+    (5, 1): ((3, 1), (5, 3)),  # Inner bottom-left
+    (5, 3): ((6, 3), (5, 1), (5, 5), (4, 3)),  # Inner bottom middle
+    (5, 5): ((3, 5), (5, 3)),  # Inner bottom-right
+    
+    # Inner Square (8 points) - corners and midpoints
+    (2, 2): ((2, 3), (3, 2)),  # Center top-left
+    (2, 3): ((1, 3), (2, 2), (2, 4)),  # Center top middle
+    (2, 4): ((2, 3), (3, 4)),  # Center top-right
+    (3, 2): ((2, 2), (3, 1), (4, 2)),  # Center left middle
+    (3, 4): ((2, 4), (3, 5), (4, 4)),  # Center right middle
+    (4, 2): ((3, 2), (4, 3)),  # Center bottom-left
+    (4, 3): ((4, 2), (4, 4), (5, 3)),  # Center bottom middle
+    (4, 4): ((3, 4), (4, 3))   # Center bottom-right
+})
+
+# Define all possible mills (three-in-a-row)
+MILLS = (
+    # Horizontal mills
+    ((0, 0), (0, 3), (0, 6)),
+    ((1, 1), (1, 3), (1, 5)),
+    ((2, 2), (2, 3), (2, 4)),
+    ((3, 0), (3, 1), (3, 2)),
+    ((3, 4), (3, 5), (3, 6)),
+    ((4, 2), (4, 3), (4, 4)),
+    ((5, 1), (5, 3), (5, 5)),
+    ((6, 0), (6, 3), (6, 6)),
+    # Vertical mills
+    ((0, 0), (3, 0), (6, 0)),
+    ((1, 1), (3, 1), (5, 1)),
+    ((2, 2), (3, 2), (4, 2)),
+    ((0, 3), (1, 3), (2, 3)),
+    ((4, 3), (5, 3), (6, 3)),
+    ((2, 4), (3, 4), (4, 4)),
+    ((1, 5), (3, 5), (5, 5)),
+    ((0, 6), (3, 6), (6, 6))
+)
+
+# Bitboard tables - bit i of an occupancy mask stands for SQUARES[i]
+# Squares are kept in (x, y) scan order so move lists keep their old order
+SQUARES = tuple(sorted(TILES))
+SQUARE_INDEX = MappingProxyType({pos: i for i, pos in enumerate(SQUARES)})
+FULL_MASK = (1 << len(SQUARES)) - 1
+MILL_MASKS = tuple(sum(1 << SQUARE_INDEX[pos] for pos in mill) for mill in MILLS)
+NEIGHBORS = tuple(tuple(SQUARE_INDEX[pos] for pos in ADJACENCY[square]) for square in SQUARES)
+ADJACENT_MASKS = tuple(sum(1 << neighbor for neighbor in neighbors) for neighbors in NEIGHBORS)
+# Every square lies on exactly two mills; these are the partner pairs that complete them
+MILL_PARTNERS = tuple(tuple(mask ^ 1 << square for mask in MILL_MASKS if mask >> square & 1)
+                      for square in range(len(SQUARES)))
+# Per-mill piece counts are packed 2 bits per mill, mill i at bit 2 * i. A piece on a
+# square adds MILL_COUNT_STEPS[square] to its owner's packed counts
+MILL_SHIFTS = tuple((2 * i, mask) for i, mask in enumerate(MILL_MASKS))
+MILL_COUNT_STEPS = tuple(sum(1 << shift for shift, mask in MILL_SHIFTS if mask >> square & 1)
+                         for square in range(len(SQUARES)))
+FULL_MILL_BITS = sum(1 << shift for shift, mask in MILL_SHIFTS)  # Low bit of every packed mill count
+
+NO_SQUARE = len(SQUARES)  # Square field of a move that has no source, target or removal
+# Weights of evaluate_position's terms: preventing an immediate loss, creating a mill,
+# blocking an opponent two-in-a-row, each completed mill and each open two-in-a-row
+EVALUATION_WEIGHTS = (900000, 800000, 700000, 600000, 500000)
+MAX_TURNS = 600  # Bound on turns in one position: 63 flying moves, each with up to 9 removals
+
+# Zobrist keys, drawn from a fixed seed so position keys agree across processes and runs
+ZOBRIST_SEED = 0x4D494C4C
+_zobrist_random = random.Random(ZOBRIST_SEED)
+ZOBRIST_PIECES = tuple(tuple(_zobrist_random.getrandbits(64) for square in SQUARES) for side in range(2))
+ZOBRIST_PLACED = tuple(_zobrist_random.getrandbits(64) for placed in range(19))
+ZOBRIST_SIDE = _zobrist_random.getrandbits(64)  # Black to move
+ZOBRIST_PENDING = _zobrist_random.getrandbits(64)  # A removal is pending
+
+
+def zobrist_key(white, black, placed, side, pending_removal):
+    """Zobrist key of a position given as in Game.position()"""
+    key = ZOBRIST_PLACED[placed]
+    for pieces, table in ((white, ZOBRIST_PIECES[0]), (black, ZOBRIST_PIECES[1])):
+        while pieces:
+            low = pieces & -pieces
+            key ^= table[low.bit_length() - 1]
+            pieces ^= low
+    if side:
+        key ^= ZOBRIST_SIDE
+    if pending_removal:
+        key ^= ZOBRIST_PENDING
+    return key
+
+
+def encode_move(source, target, removal=NO_SQUARE):
+    """Pack square indices into a move int: 5 bits each for source, target and removal"""
+    return source | target << 5 | removal << 10
+
+
+def decode_move(move):
+    """Unpack a move int into (source, target, removal) square indices"""
+    return move & 31, move >> 5 & 31, move >> 10 & 31
+
+
+def square_name(square):
+    """Name of a square index: column a-g from x and row 1-7 from y, like 'a1'"""
+    x, y = SQUARES[square]
+    return 'abcdefg'[x] + str(y + 1)
+
+
+SQUARE_NAMES = MappingProxyType({square_name(square): square for square in range(len(SQUARES))})  # 'a1' -> index
+
+
+def move_notation(move):
+    """Text form of a move int: 'd2' places, 'a1-a4' moves, 'xd7' names the piece removed"""
+    source, target, removal = decode_move(move)
+    text = ''
+    if target != NO_SQUARE:
+        text = square_name(target) if source == NO_SQUARE else square_name(source) + '-' + square_name(target)
+    if removal != NO_SQUARE:
+        text += 'x' + square_name(removal)
+    return text
+
 
 class Game:
     def __init__(self):
-        # 7x7 grid where only 24 positions are available
-        self.board = [['.' for i in range(7)] for i in range(7)]
-        
-        # Available positions (x, y) coordinates based on the image
-        self.tiles = {
-            # Outer Square (8 nodes)
-            (0, 0), (0, 3), (0, 6),  # Top row
-            (3, 6), (6, 6), (6, 3), (6, 0), (3, 0),  # Right, bottom, left sides
-            
-            # Middle Square (8 nodes)
-            (1, 1), (1, 3), (1, 5),  # Top row
-            (3, 5), (5, 5), (5, 3), (5, 1), (3, 1),  # Right, bottom, left sides
-            
-            # Inner Square (8 nodes)
-            (2, 2), (2, 3), (2, 4),  # Top row
-            (3, 4), (4, 4), (4, 3), (4, 2), (3, 2)   # Right, bottom, left sides
-        }
+        # Board topology - shared, read-only tables
+        self.tiles = TILES
+        self.adjacency = ADJACENCY
+        self.mills = MILLS
         
         # Game state
         self.placed = 0  # Total pieces placed
-        self.white = 0   # White pieces on board
-        self.black = 0   # Black pieces on board
-        self.white_removed = 0  # White pieces removed
-        self.black_removed = 0  # Black pieces removed
-        self.player = 'W'  # Current player
-        self.history = []
+        self.bitboards = [0, 0]  # White and black occupancy, one bit per square
+        self.mill_counts = [0, 0]  # White and black pieces on each mill, packed as in MILL_SHIFTS
+        self.side = 0  # Current player: 0 for white, 1 for black
+        self.pending_removal = False  # A mill was closed and its removal is still to be made
+        self.key = ZOBRIST_PLACED[0]  # Zobrist key of the position, kept up to date by make/unmake
+        # Undo stack of packed records: the move in bits 0-14, the mover in bit 15
+        # and the previous pending_removal in bit 16
+        self.history = array('i', bytes(4 * 256))
+        self.history_length = 0
         self.game_started = False  # Track if a game has been started
-        
-        # Define adjacency for each position based on the image
-        # Only positions connected by lines are adjacent
-        self.adjacency = {
-            # Outer Square (8 points) - corners and midpoints
-            (0, 0): [(0, 3), (3, 0)],  # Top-left corner
-            (0, 3): [(0, 0), (0, 6), (1, 3)],  # Top middle
-            (0, 6): [(0, 3), (3, 6)],  # Top-right corner
-            (3, 0): [(0, 0), (6, 0)],  # Left middle
-            (3, 6): [(0, 6), (6, 6)],  # Right middle
-            (6, 0): [(3, 0), (6, 3)],  # Bottom-left corner
-            (6, 3): [(6, 0), (6, 6), (5, 3)],  # Bottom middle
-            (6, 6): [(3, 6), (6, 3)],  # Bottom-right corner
-            
-            # Middle Square (8 points) - corners and midpoints
-            (1, 1): [(1, 3), (3, 1)],  # Inner top-left
-            (1, 3): [(0, 3), (1, 1), (1, 5), (2, 3)],  # Inner top middle
-            (1, 5): [(1, 3), (3, 5)],  # Inner top-right
-            (3, 1): [(1, 1), (3, 0), (3, 2), (5, 1)],  # Inner left middle
-            (3, 5): [(1, 5), (3, 6), (5, 5)],  # Inner right middle
-            (5, 1): [(3, 1), (5, 3)],  # Inner bottom-left
-            (5, 3): [(6, 3), (5, 1), (5, 5), (4, 3)],  # Inner bottom middle
-            (5, 5): [(3, 5), (5, 3)],  # Inner bottom-right
-            
-            # Inner Square (8 points) - corners and midpoints
-            (2, 2): [(2, 3), (3, 2)],  # Center top-left
-            (2, 3): [(1, 3), (2, 2), (2, 4)],  # Center top middle
-            (2, 4): [(2, 3), (3, 4)],  # Center top-right
-            (3, 2): [(2, 2), (3, 1), (4, 2)],  # Center left middle
-            (3, 4): [(2, 4), (3, 5), (4, 4)],  # Center right middle
-            (4, 2): [(3, 2), (4, 3)],  # Center bottom-left
-            (4, 3): [(2, 3), (4, 2), (4, 4), (5, 3)],  # Center bottom middle
-            (4, 4): [(3, 4), (4, 3)]   # Center bottom-right
-        }
-        
-        # Define all possible mills (three-in-a-row)
-        self.mills = [
-            # Horizontal mills
-            [(0, 0), (0, 3), (0, 6)],
-            [(1, 1), (1, 3), (1, 5)],
-            [(2, 2), (2, 3), (2, 4)],
-            [(3, 0), (3, 1), (3, 2)],
-            [(3, 4), (3, 5), (3, 6)],
-            [(4, 2), (4, 3), (4, 4)],
-            [(5, 1), (5, 3), (5, 5)],
-            [(6, 0), (6, 3), (6, 6)],
-            # Vertical mills
-            [(0, 0), (3, 0), (6, 0)],
-            [(1, 1), (3, 1), (5, 1)],
-            [(2, 2), (3, 2), (4, 2)],
-            [(0, 3), (1, 3), (2, 3)],
-            [(4, 3), (5, 3), (6, 3)],
-            [(2, 4), (3, 4), (4, 4)],
-            [(1, 5), (3, 5), (5, 5)],
-            [(0, 6), (3, 6), (6, 6)]
-        ]
 
     def start(self):
         """Reset the game to initial state"""
-        self.board = [['.' for i in range(7)] for i in range(7)]
         self.placed = 0
-        self.white = 0
-        self.black = 0
-        self.white_removed = 0
-        self.black_removed = 0
-        self.player = 'W'
-        self.history = []
+        self.bitboards = [0, 0]
+        self.mill_counts = [0, 0]
+        self.side = 0
+        self.pending_removal = False
+        self.key = ZOBRIST_PLACED[0]
+        self.history_length = 0
         self.game_started = True
 
+    @property
+    def player(self):
+        """Current player as 'W' or 'B'"""
+        return 'WB'[self.side]
+
+    @property
+    def white(self):
+        """White pieces on board"""
+        return self.bitboards[0].bit_count()
+
+    @property
+    def black(self):
+        """Black pieces on board"""
+        return self.bitboards[1].bit_count()
+
+    @property
+    def white_removed(self):
+        """White pieces removed - white places on even plies, so it has placed ceil(placed / 2)"""
+        return (self.placed + 1) // 2 - self.white
+
+    @property
+    def black_removed(self):
+        """Black pieces removed"""
+        return self.placed // 2 - self.black
+
+    @property
+    def board(self):
+        """7x7 grid view of the bitboards, '.' for empty and off-board cells"""
+        board = [['.' for i in range(7)] for i in range(7)]
+        white, black = self.bitboards
+        for i, (x, y) in enumerate(SQUARES):
+            if white >> i & 1:
+                board[y][x] = 'W'
+            elif black >> i & 1:
+                board[y][x] = 'B'
+        return board
+
+    def piece_at(self, x, y):
+        """Return 'W', 'B' or '.' for the given coordinates"""
+        square = SQUARE_INDEX.get((x, y))
+        if square is None:
+            return '.'
+        if self.bitboards[0] >> square & 1:
+            return 'W'
+        if self.bitboards[1] >> square & 1:
+            return 'B'
+        return '.'
+
+    def empty_mask(self):
+        """Bitboard of unoccupied squares"""
+        return FULL_MASK & ~(self.bitboards[0] | self.bitboards[1])
+
+    def reachable_mask(self, side):
+        """Bitboard of empty squares that one of side's pieces could move to"""
+        pieces = self.bitboards[side]
+        empty = self.empty_mask()
+        if not pieces:
+            return 0
+        if pieces.bit_count() <= 3:
+            return empty  # Flying
+        reach = 0
+        while pieces:
+            low = pieces & -pieces
+            reach |= ADJACENT_MASKS[low.bit_length() - 1]
+            pieces ^= low
+        return reach & empty
+
     def switch_player(self):
         """Switch to the other player"""
-        self.player = 'B' if self.player == 'W' else 'W'
+        self.side ^= 1
+        self.key ^= ZOBRIST_SIDE
+
+    def keep_turn_for_removal(self):
+        """Hand the turn back to the player who just closed a mill so they can remove a piece"""
+        self.switch_player()
+        self.pending_removal = True
+        self.key ^= ZOBRIST_PENDING
+
+    def compute_key(self):
+        """Zobrist key of the position computed from scratch"""
+        return zobrist_key(self.bitboards[0], self.bitboards[1], self.placed, self.side, self.pending_removal)
+
+    def position(self):
+        """Compact state (white, black, placed, side, pending_removal), restored by set_position"""
+        return self.bitboards[0], self.bitboards[1], self.placed, self.side, self.pending_removal
+
+    def set_position(self, position):
+        """Load a tuple from position(); the undo history starts empty"""
+        white, black, self.placed, self.side, pending_removal = position
+        self.bitboards = [white, black]
+        self.pending_removal = bool(pending_removal)
+        self.mill_counts = [0, 0]
+        for side in (0, 1):
+            pieces = self.bitboards[side]
+            while pieces:
+                low = pieces & -pieces
+                self.mill_counts[side] += MILL_COUNT_STEPS[low.bit_length() - 1]
+                pieces ^= low
+        self.key = self.compute_key()
+        self.history_length = 0
+        self.game_started = True
 
     def is_placement_phase(self):
         """Check if we're still in the placement phase"""
@@ -111,29 +297,26 @@ class Game:
         if self.placed >= 18:
             return False, "All pieces have been placed"
         
-        if (x, y) not in self.tiles:
+        if self.pending_removal:
+            return False, "A piece must be removed first"
+        
+        square = SQUARE_INDEX.get((x, y))
+        if square is None:
             return False, "Invalid position"
         
-        if self.board[y][x] != '.':
+        bit = 1 << square
+        if (self.bitboards[0] | self.bitboards[1]) & bit:
             return False, "Position already occupied"
         
         # Place the piece
-        self.board[y][x] = self.player
-        self.placed += 1
-        if self.player == 'W':
-            self.white += 1
-        else:
-            self.black += 1
+        self.make_move(encode_move(NO_SQUARE, square))
         
         # Check for mill formation
         mill_formed = self.check_mill(x, y)
         
-        # Record the move
-        self.history.append(('place', x, y, None, mill_formed))
-        
-        # Switch player (unless a mill was formed, then same player gets another turn)
-        if not mill_formed:
-            self.switch_player()
+        # Same player gets another turn to remove a piece if a mill was formed
+        if mill_formed:
+            self.keep_turn_for_removal()
         
         return True, "Piece placed successfully" + (" - Mill formed!" if mill_formed else "")
 
@@ -142,13 +325,18 @@ class Game:
         if self.placed < 18:
             return False, "Still in placement phase"
         
-        if (x, y) not in self.tiles or (nx, ny) not in self.tiles:
+        if self.pending_removal:
+            return False, "A piece must be removed first"
+        
+        if (x, y) not in SQUARE_INDEX or (nx, ny) not in SQUARE_INDEX:
             return False, "Invalid position"
         
-        if self.board[y][x] != self.player:
+        source = SQUARE_INDEX[(x, y)]
+        target = SQUARE_INDEX[(nx, ny)]
+        if not self.bitboards[self.side] >> source & 1:
             return False, "No piece of current player at source position"
         
-        if self.board[ny][nx] != '.':
+        if not self.empty_mask() >> target & 1:
             return False, "Destination position is occupied"
         
         # Check if move is valid (adjacent or flying)
@@ -156,141 +344,274 @@ class Game:
             return False, "Invalid move - positions not adjacent"
         
         # Move the piece
-        self.board[y][x] = '.'
-        self.board[ny][nx] = self.player
+        self.make_move(encode_move(source, target))
         
         # Check for mill formation
         mill_formed = self.check_mill(nx, ny)
         
-        # Record the move
-        self.history.append(('move', x, y, nx, ny, mill_formed))
-        
-        # Switch player (unless a mill was formed, then same player gets another turn)
-        if not mill_formed:
-            self.switch_player()
+        # Same player gets another turn to remove a piece if a mill was formed
+        if mill_formed:
+            self.keep_turn_for_removal()
         
         return True, "Piece moved successfully" + (" - Mill formed!" if mill_formed else "")
 
     def is_valid_move(self, x, y, nx, ny):
         """Check if a move is valid"""
         # If player has only 3 pieces left, they can fly (move anywhere)
-        pieces_on_board = self.white if self.player == 'W' else self.black
-        if pieces_on_board <= 3:
+        if self.bitboards[self.side].bit_count() <= 3:
             return True
         
         # Otherwise, must move to adjacent position
-        return (nx, ny) in self.adjacency[(x, y)]
+        return ADJACENT_MASKS[SQUARE_INDEX[(x, y)]] >> SQUARE_INDEX[(nx, ny)] & 1 == 1
 
     def check_mill(self, x, y):
         """Check if placing/moving a piece at (x,y) forms a mill"""
-        player = self.board[y][x]
-        for mill in self.mills:
-            if (x, y) in mill:
-                if all(self.board[pos[1]][pos[0]] == player for pos in mill):
-                    return True
+        square = SQUARE_INDEX[(x, y)]
+        bit = 1 << square
+        for pieces in self.bitboards:
+            if pieces & bit:
+                return self.forms_mill(square, pieces)
         return False
 
+    def forms_mill(self, square, pieces):
+        """Check if square completes a mill within the occupancy mask pieces"""
+        first, second = MILL_PARTNERS[square]
+        return pieces & first == first or pieces & second == second
+
     def remove_piece(self, x, y):
         """Remove an opponent's piece (after forming a mill)"""
-        if (x, y) not in self.tiles:
+        if not self.pending_removal:
+            return False, "No mill has been formed"
+        
+        square = SQUARE_INDEX.get((x, y))
+        if square is None:
             return False, "Invalid position"
         
-        opponent = 'B' if self.player == 'W' else 'W'
-        if self.board[y][x] != opponent:
+        opponent = self.side ^ 1
+        if not self.bitboards[opponent] >> square & 1:
             return False, "No opponent piece at that position"
         
-        # Check if piece is in a mill (can only remove if no other pieces available)
-        if self.is_in_mill(x, y, opponent):
-            # Check if all opponent pieces are in mills
-            opponent_positions = [(x, y) for x in range(7) for y in range(7) 
-                                if self.board[y][x] == opponent]
-            if all(self.is_in_mill(pos[0], pos[1], opponent) for pos in opponent_positions):
-                pass  # Can remove from mill
-            else:
-                return False, "Cannot remove piece from mill unless all pieces are in mills"
+        # A piece in a mill can only be taken when every opponent piece is in one
+        if not self.removable_pieces(opponent) >> square & 1:
+            return False, "Cannot remove piece from mill unless all pieces are in mills"
         
         # Remove the piece
-        self.board[y][x] = '.'
-        if opponent == 'W':
-            self.white -= 1
-            self.white_removed += 1
-        else:
-            self.black -= 1
-            self.black_removed += 1
-        
-        self.history.append(('remove', x, y, None, None))
-        self.switch_player()
+        self.make_move(encode_move(NO_SQUARE, NO_SQUARE, square))
         return True, "Piece removed successfully"
 
     def is_in_mill(self, x, y, player):
         """Check if a piece is part of a mill"""
-        for mill in self.mills:
-            if (x, y) in mill:
-                if all(self.board[pos[1]][pos[0]] == player for pos in mill):
-                    return True
-        return False
+        pieces = self.bitboards[0 if player == 'W' else 1]
+        square = SQUARE_INDEX[(x, y)]
+        return bool(pieces >> square & 1) and self.forms_mill(square, pieces)
 
     def undo(self):
         """Undo the last move"""
-        if not self.history:
+        if not self.history_length:
             return False, "No moves to undo"
         
-        action, x, y, nx, ny, mill_formed = self.history.pop()
-        
-        if action == 'place':
-            self.board[y][x] = '.'
-            self.placed -= 1
-            if self.player == 'B':  # Undoing white's move
-                self.white -= 1
-            else:  # Undoing black's move
-                self.black -= 1
-        elif action == 'move':
-            self.board[ny][nx] = '.'
-            self.board[y][x] = self.player
-        elif action == 'remove':
-            opponent = 'B' if self.player == 'W' else 'W'
-            self.board[y][x] = opponent
-            if opponent == 'W':
-                self.white += 1
-                self.white_removed -= 1
-            else:
-                self.black += 1
-                self.black_removed -= 1
-        
-        # Switch player back
-        self.switch_player()
+        self.unmake_move()
         return True, "Move undone"
 
+    def make_move(self, move):
+        """Play an encoded move and finish the turn, recording it on the undo stack
+
+        A move with a removal is a whole turn, including the piece it takes. A move with
+        only a removal completes a turn whose mill was closed through place() or move().
+        """
+        side = self.side
+        if self.history_length == len(self.history):
+            self.history.frombytes(bytes(4 * len(self.history)))
+        self.history[self.history_length] = move | side << 15 | self.pending_removal << 16
+        self.history_length += 1
+        
+        key = self.key ^ ZOBRIST_SIDE
+        if self.pending_removal:
+            key ^= ZOBRIST_PENDING
+        source = move & 31
+        target = move >> 5 & 31
+        removal = move >> 10
+        if target != NO_SQUARE:
+            if source == NO_SQUARE:
+                self.bitboards[side] |= 1 << target
+                self.mill_counts[side] += MILL_COUNT_STEPS[target]
+                key ^= ZOBRIST_PIECES[side][target] ^ ZOBRIST_PLACED[self.placed] ^ ZOBRIST_PLACED[self.placed + 1]
+                self.placed += 1
+            else:
+                self.bitboards[side] ^= 1 << source | 1 << target
+                self.mill_counts[side] += MILL_COUNT_STEPS[target] - MILL_COUNT_STEPS[source]
+                key ^= ZOBRIST_PIECES[side][source] ^ ZOBRIST_PIECES[side][target]
+        if removal != NO_SQUARE:
+            self.bitboards[side ^ 1] ^= 1 << removal
+            self.mill_counts[side ^ 1] -= MILL_COUNT_STEPS[removal]
+            key ^= ZOBRIST_PIECES[side ^ 1][removal]
+        self.pending_removal = False
+        self.side = side ^ 1
+        self.key = key
+
+    def unmake_move(self):
+        """Take back the last make_move, restoring the exact previous state"""
+        self.history_length -= 1
+        record = self.history[self.history_length]
+        side = record >> 15 & 1
+        pending = record >> 16 == 1
+        
+        # place() and move() may have handed the turn back for a removal, so compare
+        # against the current state rather than assuming the side to move flipped
+        key = self.key
+        if side != self.side:
+            key ^= ZOBRIST_SIDE
+        if pending != self.pending_removal:
+            key ^= ZOBRIST_PENDING
+        source = record & 31
+        target = record >> 5 & 31
+        removal = record >> 10 & 31
+        if removal != NO_SQUARE:
+            self.bitboards[side ^ 1] |= 1 << removal
+            self.mill_counts[side ^ 1] += MILL_COUNT_STEPS[removal]
+            key ^= ZOBRIST_PIECES[side ^ 1][removal]
+        if target != NO_SQUARE:
+            if source == NO_SQUARE:
+                self.placed -= 1
+                self.bitboards[side] ^= 1 << target
+                self.mill_counts[side] -= MILL_COUNT_STEPS[target]
+                key ^= ZOBRIST_PIECES[side][target] ^ ZOBRIST_PLACED[self.placed] ^ ZOBRIST_PLACED[self.placed + 1]
+            else:
+                self.bitboards[side] ^= 1 << source | 1 << target
+                self.mill_counts[side] -= MILL_COUNT_STEPS[target] - MILL_COUNT_STEPS[source]
+                key ^= ZOBRIST_PIECES[side][source] ^ ZOBRIST_PIECES[side][target]
+        self.pending_removal = pending
+        self.side = side
+        self.key = key
+
     def get_valid_moves(self):
-        """Get all valid moves for the current player"""
+        """Valid moves of the current player as ('place', x, y) or ('move', from_x, from_y, to_x, to_y)
+
+        Adapter over iter_turns for main() and other coordinate callers. A move that closes
+        a mill is listed once, whatever it removes, and nothing is listed while a removal
+        is pending.
+        """
+        if self.pending_removal:
+            return []
+        squares = SQUARES
         moves = []
+        previous = None
+        for turn in self.iter_turns():
+            move = turn & 0x3FF
+            if move == previous:
+                continue  # The same move with another removal
+            previous = move
+            source, target = move & 31, move >> 5
+            if source == NO_SQUARE:
+                moves.append(('place',) + squares[target])
+            else:
+                moves.append(('move',) + squares[source] + squares[target])
+        return moves
+
+    def closed_mill_pieces(self, side):
+        """Bitboard of side's pieces that stand in a closed mill, read from the mill counts"""
+        counts = self.mill_counts[side]
+        full = counts & counts >> 1 & FULL_MILL_BITS  # Low bit of each mill count that is 3
+        in_mill = 0
+        while full:
+            low = full & -full
+            in_mill |= MILL_MASKS[low.bit_length() >> 1]
+            full ^= low
+        return in_mill
+
+    def removable_pieces(self, side):
+        """Bitboard of side's pieces that may be removed - mill pieces only if nothing else is left"""
+        pieces = self.bitboards[side]
+        return pieces & ~self.closed_mill_pieces(side) or pieces
+
+    def legal_removals(self):
+        """(x, y) of every piece the current player may remove, empty unless a removal is pending"""
+        if not self.pending_removal:
+            return []
+        removable = self.removable_pieces(self.side ^ 1)
+        return [SQUARES[square] for square in range(len(SQUARES)) if removable >> square & 1]
+
+    def get_valid_turns(self):
+        """Get every full turn for the current player as a list of encoded moves
+
+        A move that closes a mill is listed once per piece it may remove, so a mill and
+        its removal are a single entry. With a removal pending only removals are listed.
+        """
+        return list(self.iter_turns())
+
+    def generate_turns(self, buffer):
+        """Write the turns of get_valid_turns into buffer, an array of at least MAX_TURNS ints
+
+        Returns the number written, so one preallocated buffer can serve every call.
+        """
+        count = 0
+        for turn in self.iter_turns():
+            buffer[count] = turn
+            count += 1
+        return count
+
+    def iter_turns(self):
+        """Yield the turns of get_valid_turns one at a time, in the same order"""
+        side = self.side
+        pieces = self.bitboards[side]
+        empty = self.empty_mask()
+        removable = None
+        
+        if self.pending_removal:
+            candidates = self.removable_pieces(side ^ 1)
+            while candidates:
+                victim = candidates & -candidates
+                yield encode_move(NO_SQUARE, NO_SQUARE, victim.bit_length() - 1)
+                candidates ^= victim
+            return
         
         if self.is_placement_phase():
-            # Placement phase
-            for x in range(7):
-                for y in range(7):
-                    if (x, y) in self.tiles and self.board[y][x] == '.':
-                        moves.append(('place', x, y))
+            movers = [(NO_SQUARE, pieces, empty)]
         else:
-            # Movement phase
-            player_positions = [(x, y) for x in range(7) for y in range(7) 
-                              if self.board[y][x] == self.player]
-            pieces_on_board = len(player_positions)
-            
-            for from_x, from_y in player_positions:
-                if pieces_on_board <= 3:
-                    # Flying - can move anywhere
-                    for to_x in range(7):
-                        for to_y in range(7):
-                            if (to_x, to_y) in self.tiles and self.board[to_y][to_x] == '.':
-                                moves.append(('move', from_x, from_y, to_x, to_y))
+            flying = pieces.bit_count() <= 3
+            movers = []
+            rest = pieces
+            while rest:
+                low = rest & -rest
+                source = low.bit_length() - 1
+                movers.append((source, pieces ^ low, empty if flying else ADJACENT_MASKS[source] & empty))
+                rest ^= low
+        
+        for source, others, targets in movers:
+            while targets:
+                low = targets & -targets
+                target = low.bit_length() - 1
+                move = source | target << 5
+                if self.forms_mill(target, others | low):
+                    if removable is None:
+                        removable = self.removable_pieces(side ^ 1)
+                    if not removable:
+                        yield move | NO_SQUARE << 10
+                    candidates = removable
+                    while candidates:
+                        victim = candidates & -candidates
+                        yield move | (victim.bit_length() - 1) << 10
+                        candidates ^= victim
                 else:
-                    # Normal movement - adjacent only
-                    for to_x, to_y in self.adjacency[(from_x, from_y)]:
-                        if self.board[to_y][to_x] == '.':
-                            moves.append(('move', from_x, from_y, to_x, to_y))
-        
-        return moves
+                    yield move | NO_SQUARE << 10
+                targets ^= low
+
+    def has_any_legal_move(self):
+        """Whether the current player has a turn, stopping at the first one found"""
+        if self.pending_removal:
+            return bool(self.bitboards[self.side ^ 1])
+        empty = self.empty_mask()
+        if not empty or self.is_placement_phase():
+            return bool(empty)
+        pieces = self.bitboards[self.side]
+        if pieces.bit_count() <= 3:
+            return bool(pieces)  # Flying
+        while pieces:
+            low = pieces & -pieces
+            if ADJACENT_MASKS[low.bit_length() - 1] & empty:
+                return True
+            pieces ^= low
+        return False
 
     def is_game_over(self):
         """Check if the game is over"""
@@ -309,138 +630,163 @@ class Game:
             return True, 'W'  # White wins
         
         # Check for no valid moves in movement phase
-        if not self.get_valid_moves():
+        if not self.has_any_legal_move():
             return True, 'B' if self.player == 'W' else 'W'
         
         return False, None
 
-    def evaluate_position(self):
-        """Evaluate position using exact priority system"""
+    def evaluate_position(self, weights=EVALUATION_WEIGHTS):
+        """Evaluate position using exact priority system
+
+        Reads the incrementally maintained mill counts, so it is one pass over the 16 mills
+        plus a neighbour scan of each side's pieces in the movement phase. weights are the
+        term weights in EVALUATION_WEIGHTS order.
+        """
+        white, black = self.bitboards
+        empty = FULL_MASK & ~(white | black)
+        placement = self.placed < 18
+        if placement:
+            white_reach = black_reach = empty
+        else:
+            white_reach = self.reachable_mask(0)
+            black_reach = self.reachable_mask(1)
+        white_pieces = white.bit_count()
+        black_pieces = black.bit_count()
+        
         # 1. Immediately winning
-        game_over, winner = self.is_game_over()
-        if game_over:
-            if winner == 'W':
-                return 1000000  # White wins
-            else:
+        if not placement:
+            if white_pieces < 3:
                 return -1000000  # Black wins
-        
+            if black_pieces < 3:
+                return 1000000  # White wins
+            if not (black_reach if self.side else white_reach):
+                return -1000000 if self.side == 0 else 1000000  # Side to move is blocked
+        
+        white_counts, black_counts = self.mill_counts
+        white_mills = black_mills = white_twos = black_twos = 0
+        white_gaps = black_gaps = 0
+        for shift, mask in MILL_SHIFTS:
+            white_count = white_counts >> shift & 3
+            black_count = black_counts >> shift & 3
+            if white_count == 3:
+                white_mills += 1
+            elif white_count == 2 and not black_count:
+                white_twos += 1
+                white_gaps |= mask
+            if black_count == 3:
+                black_mills += 1
+            elif black_count == 2 and not white_count:
+                black_twos += 1
+                black_gaps |= mask
+        white_gaps &= empty
+        black_gaps &= empty
+        
+        prevent_loss, create_mill, block_mill, mill, two = weights
         score = 0
         
         # 2. Preventing opponent from immediately winning
-        white_prevents_loss = self.can_prevent_immediate_loss('W')
-        black_prevents_loss = self.can_prevent_immediate_loss('B')
-        if white_prevents_loss:
-            score += 900000
-        if black_prevents_loss:
-            score -= 900000
+        if (white_pieces <= 3 and black_pieces <= 3) or not white_reach:
+            score += prevent_loss
+        if (white_pieces <= 3 and black_pieces <= 3) or not black_reach:
+            score -= prevent_loss
         
         # 3. Creating a mill
-        white_creates_mill = self.can_create_mill('W')
-        black_creates_mill = self.can_create_mill('B')
-        if white_creates_mill:
-            score += 800000
-        if black_creates_mill:
-            score -= 800000
+        if white_gaps & white_reach:
+            score += create_mill
+        if black_gaps & black_reach:
+            score -= create_mill
         
         # 4. Blocking opponent's 2-in-a-row
-        white_blocks_mill = self.can_block_opponent_mill('W')
-        black_blocks_mill = self.can_block_opponent_mill('B')
-        if white_blocks_mill:
-            score += 700000
-        if black_blocks_mill:
-            score -= 700000
+        if black_gaps & white_reach:
+            score += block_mill
+        if white_gaps & black_reach:
+            score -= block_mill
         
         # 5. Maintaining a mill
-        white_mills = self.count_mills('W')
-        black_mills = self.count_mills('B')
-        score += white_mills * 600000 - black_mills * 600000
+        score += white_mills * mill - black_mills * mill
         
         # 6. Having an unblocked 2-in-a-row
-        white_twos = self.count_two_in_row('W')
-        black_twos = self.count_two_in_row('B')
-        score += white_twos * 500000 - black_twos * 500000
+        score += white_twos * two - black_twos * two
         
         return score
 
+    def mill_gaps(self, side):
+        """Bitboard of empty squares that would complete one of side's two-in-a-rows"""
+        own = self.mill_counts[side]
+        other = self.mill_counts[side ^ 1]
+        gaps = 0
+        for shift, mask in MILL_SHIFTS:
+            if own >> shift & 3 == 2 and not other >> shift & 3:
+                gaps |= mask
+        return gaps & self.empty_mask()
+
     def count_immediate_mill_opportunities(self, player):
         """Count immediate mill formation opportunities (can form mill in next move)"""
+        side = 0 if player == 'W' else 1
+        pieces = self.bitboards[side]
+        empty = self.empty_mask()
+        # Check if we can place/move to the empty space
+        reach = empty if self.is_placement_phase() else self.reachable_mask(side)
         count = 0
-        for mill in self.mills:
-            player_pieces = sum(1 for pos in mill if self.board[pos[1]][pos[0]] == player)
-            empty_spaces = sum(1 for pos in mill if self.board[pos[1]][pos[0]] == '.')
-            if player_pieces == 2 and empty_spaces == 1:
-                # Check if we can place/move to the empty space
-                empty_pos = None
-                for pos in mill:
-                    if self.board[pos[1]][pos[0]] == '.':
-                        empty_pos = pos
-                        break
-                
-                if empty_pos:
-                    # Check if this position is reachable in the next move
-                    if self.is_placement_phase():
-                        count += 1  # Can place anywhere
-                    else:
-                        # Check if any of our pieces can move to this position
-                        player_positions = [(x, y) for x in range(7) for y in range(7) 
-                                          if self.board[y][x] == player]
-                        for px, py in player_positions:
-                            if self.can_move_to(px, py, empty_pos[0], empty_pos[1]):
-                                count += 1
-                                break
+        for mask in MILL_MASKS:
+            gap = mask & empty
+            if gap & reach and (pieces & mask).bit_count() == 2:
+                count += 1
         return count
 
     def count_mills(self, player):
         """Count how many mills a player has"""
-        count = 0
-        for mill in self.mills:
-            if all(self.board[pos[1]][pos[0]] == player for pos in mill):
-                count += 1
-        return count
+        counts = self.mill_counts[0 if player == 'W' else 1]
+        return sum(1 for shift, mask in MILL_SHIFTS if counts >> shift & 3 == 3)
 
     def count_two_in_row(self, player):
         """Count two-in-a-row pieces for a player"""
-        count = 0
-        for mill in self.mills:
-            player_pieces = sum(1 for pos in mill if self.board[pos[1]][pos[0]] == player)
-            empty_spaces = sum(1 for pos in mill if self.board[pos[1]][pos[0]] == '.')
-            if player_pieces == 2 and empty_spaces == 1:
-                count += 1
-        return count
+        side = 0 if player == 'W' else 1
+        own = self.mill_counts[side]
+        other = self.mill_counts[side ^ 1]
+        return sum(1 for shift, mask in MILL_SHIFTS if own >> shift & 3 == 2 and not other >> shift & 3)
 
     def can_move_to(self, from_x, from_y, to_x, to_y):
         """Check if a piece can move from one position to another"""
-        if not self.is_valid_move(from_x, from_y, to_x, to_y):
+        source = SQUARE_INDEX[(from_x, from_y)]
+        target = SQUARE_INDEX[(to_x, to_y)]
+        if self.empty_mask() >> target & 1 == 0:
             return False
-        return self.board[to_y][to_x] == '.'
+        # Flying is decided by the piece owner, falling back to the current player
+        owner = 1 if self.bitboards[1] >> source & 1 else 0 if self.bitboards[0] >> source & 1 else self.side
+        if self.bitboards[owner].bit_count() <= 3:
+            return True
+        return ADJACENT_MASKS[source] >> target & 1 == 1
 
     def get_opponent_mill_threats(self, player):
         """Get opponent pieces that can form mills next turn"""
-        opponent = 'B' if player == 'W' else 'W'
+        opponent = 1 if player == 'W' else 0
+        pieces = self.bitboards[opponent]
+        flying = pieces.bit_count() <= 3
+        squares = SQUARES
         threats = []
         
-        for mill in self.mills:
-            opponent_pieces = sum(1 for pos in mill if self.board[pos[1]][pos[0]] == opponent)
-            empty_spaces = sum(1 for pos in mill if self.board[pos[1]][pos[0]] == '.')
-            if opponent_pieces == 2 and empty_spaces == 1:
-                # Find the empty position
-                for pos in mill:
-                    if self.board[pos[1]][pos[0]] == '.':
-                        # Find opponent pieces that can move to this position
-                        opponent_positions = [(x, y) for x in range(7) for y in range(7) 
-                                            if self.board[y][x] == opponent]
-                        for ox, oy in opponent_positions:
-                            if self.can_move_to(ox, oy, pos[0], pos[1]):
-                                threats.append((ox, oy))
+        for mask in MILL_MASKS:
+            gap = mask & self.empty_mask()
+            if gap and (pieces & mask).bit_count() == 2:
+                # Find opponent pieces that can move to the empty position
+                target = gap.bit_length() - 1
+                movers = pieces
+                while movers:
+                    low = movers & -movers
+                    source = low.bit_length() - 1
+                    if flying or ADJACENT_MASKS[source] >> target & 1:
+                        threats.append(squares[source])
+                    movers ^= low
         return threats
 
     def can_prevent_immediate_loss(self, player):
         """Check if player can prevent immediate loss"""
-        opponent = 'B' if player == 'W' else 'W'
+        side = 0 if player == 'W' else 1
         
         # Check if opponent can win by reducing pieces to less than 3
-        opponent_pieces = self.black if opponent == 'B' else self.white
-        my_pieces = self.white if player == 'W' else self.black
+        opponent_pieces = self.bitboards[side ^ 1].bit_count()
+        my_pieces = self.bitboards[side].bit_count()
         
         if opponent_pieces <= 3 and my_pieces <= 3:
             # Check if opponent can remove enough pieces to win
@@ -448,91 +794,59 @@ class Game:
         
         # Check if opponent can block all our moves
         if not self.is_placement_phase():
-            my_valid_moves = 0
-            my_positions = [(x, y) for x in range(7) for y in range(7) 
-                           if self.board[y][x] == player]
-            for px, py in my_positions:
-                for to_x in range(7):
-                    for to_y in range(7):
-                        if (to_x, to_y) in self.tiles and self.board[to_y][to_x] == '.':
-                            if self.can_move_to(px, py, to_x, to_y):
-                                my_valid_moves += 1
-                                break
-                    if my_valid_moves > 0:
-                        break
-                if my_valid_moves > 0:
-                    break
-            
-            if my_valid_moves == 0:
+            if not self.reachable_mask(side):
                 return True
         
         return False
 
     def can_create_mill(self, player):
         """Check if player can create a mill in next move"""
-        for mill in self.mills:
-            player_pieces = sum(1 for pos in mill if self.board[pos[1]][pos[0]] == player)
-            empty_spaces = sum(1 for pos in mill if self.board[pos[1]][pos[0]] == '.')
-            if player_pieces == 2 and empty_spaces == 1:
-                # Check if we can place/move to the empty space
-                for pos in mill:
-                    if self.board[pos[1]][pos[0]] == '.':
-                        if self.is_placement_phase():
-                            return True
-                        else:
-                            # Check if any of our pieces can move to this position
-                            player_positions = [(x, y) for x in range(7) for y in range(7) 
-                                              if self.board[y][x] == player]
-                            for px, py in player_positions:
-                                if self.can_move_to(px, py, pos[0], pos[1]):
-                                    return True
-                        break
-        return False
+        side = 0 if player == 'W' else 1
+        gaps = self.mill_gaps(side)
+        if not gaps:
+            return False
+        # Check if we can place/move to the empty space
+        if self.is_placement_phase():
+            return True
+        return bool(gaps & self.reachable_mask(side))
 
     def can_block_opponent_mill(self, player):
         """Check if player can block opponent's 2-in-a-row"""
-        opponent = 'B' if player == 'W' else 'W'
-        
-        for mill in self.mills:
-            opponent_pieces = sum(1 for pos in mill if self.board[pos[1]][pos[0]] == opponent)
-            empty_spaces = sum(1 for pos in mill if self.board[pos[1]][pos[0]] == '.')
-            if opponent_pieces == 2 and empty_spaces == 1:
-                # Find the empty position that would complete opponent's mill
-                for pos in mill:
-                    if self.board[pos[1]][pos[0]] == '.':
-                        # Check if we can place/move to this position
-                        if self.is_placement_phase():
-                            return True
-                        else:
-                            # Check if any of our pieces can move to this position
-                            player_positions = [(x, y) for x in range(7) for y in range(7) 
-                                              if self.board[y][x] == player]
-                            for px, py in player_positions:
-                                if self.can_move_to(px, py, pos[0], pos[1]):
-                                    return True
-                        break
-        return False
-
-
+        side = 0 if player == 'W' else 1
+        gaps = self.mill_gaps(side ^ 1)
+        if not gaps:
+            return False
+        # Check if we can place/move to the empty position that would complete opponent's mill
+        if self.is_placement_phase():
+            return True
+        return bool(gaps & self.reachable_mask(side))
 
     def will_move_form_mill(self, move):
         """Check if a specific move will form a mill"""
+        pieces = self.bitboards[self.side]
         if move[0] == 'place':
-            x, y = move[1], move[2]
+            target = SQUARE_INDEX[(move[1], move[2])]
         else:
-            x, y = move[3], move[4]  # Destination coordinates
-        
-        # Temporarily place the piece
-        original_piece = self.board[y][x]
-        self.board[y][x] = self.player
-        
-        # Check if this forms a mill
-        mill_formed = self.check_mill(x, y)
+            target = SQUARE_INDEX[(move[3], move[4])]  # Destination coordinates
+            pieces &= ~(1 << SQUARE_INDEX[(move[1], move[2])])
         
-        # Restore the board
-        self.board[y][x] = original_piece
-        
-        return mill_formed
+        return self.forms_mill(target, pieces | 1 << target)
+
+    def threat_pieces(self, side):
+        """Bitboard of side's pieces that form an open two-in-a-row or could move into its gap"""
+        pieces = self.bitboards[side]
+        own = self.mill_counts[side]
+        other = self.mill_counts[side ^ 1]
+        flying = pieces.bit_count() <= 3
+        threats = 0
+        for shift, mask in MILL_SHIFTS:
+            if own >> shift & 3 == 2 and not other >> shift & 3:
+                if flying:
+                    threats |= pieces
+                else:
+                    gap = mask & ~pieces
+                    threats |= pieces & (mask | ADJACENT_MASKS[gap.bit_length() - 1])
+        return threats
 
     def display_board(self):
         """Display the current board state"""
@@ -560,15 +874,11 @@ class Game:
         
         # Create a mapping from board coordinates to visual positions
         # Simple approach: double the coordinates for display
-        coord_to_visual = {}
-        for x in range(7):
-            for y in range(7):
-                if (x, y) in self.tiles:
-                    coord_to_visual[(x, y)] = (y * 2, x * 2)
+        coord_to_visual = {(x, y): (y * 2, x * 2) for x, y in SQUARES}
         
         # Replace nodes with pieces
         for (x, y), (vx, vy) in coord_to_visual.items():
-            piece = self.board[y][x]
+            piece = self.piece_at(x, y)
             if piece == '.':
                 symbol = '*'  # Empty node
             elif piece == 'W':
@@ -595,15 +905,568 @@ class Game:
         print("="*50)
 
 
+TT_EXACT = 1  # Bound types of a transposition table entry; 0 marks an empty slot
+TT_LOWER = 2
+TT_UPPER = 3
+NO_MOVE = 0x7FFF  # Move field of an entry that has no best move
+
+
+class TranspositionTable:
+    """Fixed-size table of search results held in two flat preallocated arrays
+
+    Each bucket has two entries: the first keeps the deepest result stored in the bucket,
+    the second is always replaced. An entry is the 64-bit position key plus one packed word
+    of move (15 bits), bound type (2 bits), depth (8 bits) and score + 2**31 (32 bits).
+    """
+    ENTRY_BYTES = 16
+    SCORE_OFFSET = 1 << 31
+
+    def __init__(self, size_mb=16):
+        buckets = 1
+        while buckets * 4 * self.ENTRY_BYTES <= size_mb * 1024 * 1024:
+            buckets *= 2
+        self.mask = buckets - 1
+        self.keys = array('Q', bytes(16 * buckets))
+        self.data = array('Q', bytes(16 * buckets))
+        self.hits = 0  # Probes that found their key
+        self.misses = 0  # Probes that did not
+        self.collisions = 0  # Misses whose bucket was holding other positions
+        self.overwrites = 0  # Stores that evicted a different position
+
+    def clear(self):
+        """Empty the table without reallocating it"""
+        for table in (self.keys, self.data):
+            memoryview(table).cast('B')[:] = bytes(8 * len(table))
+        self.hits = self.misses = self.collisions = self.overwrites = 0
+
+    def probe(self, key):
+        """Packed entry word stored for key, or 0 if there is none"""
+        index = (key & self.mask) << 1
+        keys = self.keys
+        data = self.data
+        if keys[index] == key and data[index]:
+            self.hits += 1
+            return data[index]
+        if keys[index + 1] == key and data[index + 1]:
+            self.hits += 1
+            return data[index + 1]
+        if data[index] or data[index + 1]:
+            self.collisions += 1
+        self.misses += 1
+        return 0
+
+    def store(self, key, depth, flag, score, move):
+        """Record a search result, keeping the deeper entry of a bucket in its first slot"""
+        index = (key & self.mask) << 1
+        keys = self.keys
+        data = self.data
+        word = move | flag << 15 | depth << 17 | (score + self.SCORE_OFFSET) << 25
+        
+        if keys[index] == key or not data[index] or depth >= data[index] >> 17 & 0xFF:
+            if data[index] and keys[index] != key:
+                # The displaced entry falls back to the always-replace slot
+                if data[index + 1] and keys[index + 1] != key:
+                    self.overwrites += 1
+                keys[index + 1] = keys[index]
+                data[index + 1] = data[index]
+            keys[index] = key
+            data[index] = word
+        else:
+            if data[index + 1] and keys[index + 1] != key:
+                self.overwrites += 1
+            keys[index + 1] = key
+            data[index + 1] = word
+
+    def stats(self):
+        """Counters and fill level of the table"""
+        probes = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'collisions': self.collisions,
+            'overwrites': self.overwrites,
+            'hit_rate': self.hits / probes if probes else 0.0,
+            'entries': len(self.data),
+            'used': sum(1 for word in self.data if word),
+        }
+
+
+class EvaluationCache:
+    """Fixed-size table of static evaluations held in two flat preallocated arrays
+
+    Each bucket has two entries in least recently used order: a hit moves its entry to the
+    front and a store evicts the entry at the back. An entry is the 64-bit position key and
+    the score.
+    """
+    ENTRY_BYTES = 16
+
+    def __init__(self, size_mb=4):
+        buckets = 1
+        while buckets * 4 * self.ENTRY_BYTES <= size_mb * 1024 * 1024:
+            buckets *= 2
+        self.mask = buckets - 1
+        self.keys = array('Q', bytes(16 * buckets))
+        self.scores = array('q', bytes(16 * buckets))
+        self.hits = 0  # Probes that found their key
+        self.misses = 0  # Probes that did not
+        self.evictions = 0  # Stores that pushed another position out
+
+    def clear(self):
+        """Empty the table without reallocating it"""
+        for table in (self.keys, self.scores):
+            memoryview(table).cast('B')[:] = bytes(8 * len(table))
+        self.hits = self.misses = self.evictions = 0
+
+    def probe(self, key):
+        """Score stored for key, or None if there is none"""
+        index = (key & self.mask) << 1
+        keys = self.keys
+        if keys[index] == key:
+            self.hits += 1
+            return self.scores[index]
+        if keys[index + 1] == key:
+            # Move the entry to the front of its bucket
+            scores = self.scores
+            keys[index + 1], keys[index] = keys[index], key
+            scores[index + 1], scores[index] = scores[index], scores[index + 1]
+            self.hits += 1
+            return scores[index]
+        self.misses += 1
+        return None
+
+    def store(self, key, score):
+        """Record a score at the front of its bucket, evicting the least recently used entry"""
+        index = (key & self.mask) << 1
+        keys = self.keys
+        scores = self.scores
+        if keys[index + 1]:
+            self.evictions += 1
+        keys[index + 1] = keys[index]
+        scores[index + 1] = scores[index]
+        keys[index] = key
+        scores[index] = score
+
+    def stats(self):
+        """Counters and fill level of the table"""
+        probes = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / probes if probes else 0.0,
+            'entries': len(self.keys),
+            'used': sum(1 for key in self.keys if key),
+        }
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when its time budget runs out"""
+
+
 class MinimaxAI:
-    def __init__(self, game):
+    WIN_SCORE = 10 ** 9  # Above any evaluate_position score, so a forced win always dominates
+    MAX_DEPTH = 64  # Iterative deepening limit when only a time budget is given
+    MAX_PLY = 128  # Plies with killer move slots
+    QUIESCENCE_NODES = 64  # Node budget of each quiescence search started at the horizon
+    CLOCK_CHECK_MASK = 15  # The clock is read every 16 nodes, well under a millisecond
+    # Time kept back from time_ms for unwinding the search and answering: a share of it
+    # plus a fixed part for the work that does not shrink with the budget
+    TIME_MARGIN = 0.05
+    TIME_MARGIN_MS = 1.0
+
+    # Move ordering tiers, highest first; history scores stay below KILLER_BONUS
+    TT_MOVE_BONUS = 1 << 30
+    MILL_BONUS = 1 << 28
+    THREAT_REMOVAL_BONUS = 1 << 26
+    BLOCK_BONUS = 1 << 24
+    KILLER_BONUS = 1 << 22
+
+    def __init__(self, game, tt_size_mb=16, endgame_db=None, weights=EVALUATION_WEIGHTS, book=None,
+                 quiescence_nodes=QUIESCENCE_NODES, eval_cache_mb=4):
         self.game = game
+        self.weights = tuple(weights)  # Evaluation weights, see EVALUATION_WEIGHTS
+        # Static evaluations kept across calls like the table; 0 MB turns the cache off
+        self.eval_cache = EvaluationCache(eval_cache_mb) if eval_cache_mb else None
+        self.quiescence_budget = quiescence_nodes  # 0 scores the horizon statically
+        self.quiescence_left = 0  # Budget left to the running quiescence search
+        self.quiescence_nodes = 0  # Nodes of the last get_best_move call spent in quiescence
+        self.tt = TranspositionTable(tt_size_mb)  # Kept across calls so later searches reuse it
+        self.endgame_db = endgame_db  # Optional solved endgames with a probe(mover, opponent) method
+        self.endgame_hits = 0  # Nodes of the last get_best_move call answered by endgame_db
+        self.book = book  # Optional opening book with a probe(game) method, see opening_book.py
+        self.book_hit = False  # Whether the last get_best_move call answered from the book
+        self.nodes = 0  # Nodes searched by the last get_best_move call
+        self.elapsed = 0.0  # Seconds spent by the last get_best_move call
+        self.best_score = None  # Score of the returned move, from white's point of view
+        self.depth_reached = 0  # Deepest iteration completed by the last get_best_move call
+        self.pv = []  # Principal variation of that iteration, as encoded moves
+        self.deadline = float('inf')
+        self.root_ply = 0  # Undo stack length at the root, so history_length - root_ply is the ply
+        self.killers = [[NO_MOVE, NO_MOVE] for ply in range(self.MAX_PLY)]  # Quiet cutoff moves per ply
+        self.history_scores = array('i', bytes(4 * 2048))  # By side << 10 | source | target << 5
+        self.cutoffs = 0  # Beta cutoffs in the last get_best_move call
+        self.first_move_cutoffs = 0  # Those produced by the first turn searched
+        self.iteration_nodes = []  # Total nodes after each completed iteration
+
+    @property
+    def nodes_per_second(self):
+        """Search throughput of the last get_best_move call"""
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def get_best_move(self, depth=None, time_ms=None):
+        """Search the current position and return (move, removal) for the current player
+
+        Runs iterative deepening up to depth turns, or up to MAX_DEPTH when only time_ms is
+        given. Shortly before time_ms milliseconds are spent the search stops and answers
+        from the deepest iteration that completed, or with the first turn in search order
+        (and best_score None) if not even the first did. A position found in the book is
+        answered at once without searching.
+
+        move uses the get_valid_moves format and removal is the (x, y) of the piece to take
+        if the move closes a mill, otherwise None. With a removal pending, move is None.
+        Returns None when there is no legal move. Raises ValueError without a depth or
+        time_ms, as the search would then never end.
+        """
+        if depth is None and time_ms is None:
+            raise ValueError("get_best_move needs a depth or a time_ms budget")
+        game = self.game
+        squares = SQUARES
+        self.nodes = 0
+        self.quiescence_nodes = 0
+        self.endgame_hits = 0
+        self.book_hit = False
+        self.depth_reached = 0
+        self.pv = []
+        self.reset_ordering()
+        start = time.perf_counter()
+        max_depth = depth if depth is not None else self.MAX_DEPTH
+        deadline = float('inf')
+        if time_ms is not None:
+            deadline = start + (time_ms * (1 - self.TIME_MARGIN) - self.TIME_MARGIN_MS) / 1000
+        history_length = self.root_ply = game.history_length
+        
+        turns = game.get_valid_turns()
+        if not turns:
+            self.elapsed = time.perf_counter() - start
+            self.best_score = None
+            return None
+        best_turn = turns[0] if len(turns) == 1 else None
+        best_score = None
+        if self.book is not None and best_turn is None:
+            book_turn = self.book.probe(game)
+            if book_turn in turns:
+                best_turn = book_turn
+                self.book_hit = True
+                self.pv = [book_turn]
+                max_depth = 0  # Book move, nothing to search
+        
+        for iteration in range(1, max_depth + 1):
+            if best_turn is not None and len(turns) == 1:
+                break  # Forced move, nothing to search
+            self.deadline = deadline
+            try:
+                best_turn, best_score = self.search_root(game, turns, iteration, best_turn)
+            except SearchTimeout:
+                while game.history_length > history_length:
+                    game.unmake_move()
+                if best_turn is None:
+                    best_turn = self.order_turns(game, list(turns), self.tt.probe(game.key) & NO_MOVE)[0]
+                break
+            self.depth_reached = iteration
+            self.iteration_nodes.append(self.nodes)
+            self.pv = self.principal_variation(game, iteration)
+            if abs(best_score) > self.WIN_SCORE // 2:
+                break  # Forced result, deeper iterations cannot change it
+        
+        self.deadline = float('inf')
+        self.elapsed = time.perf_counter() - start
+        self.best_score = best_score
+        if best_turn is None:
+            return None
+        
+        source, target, removal = decode_move(best_turn)
+        if target == NO_SQUARE:
+            move = None  # Only the pending removal is left to make
+        elif source == NO_SQUARE:
+            move = ('place',) + squares[target]
+        else:
+            move = ('move',) + squares[source] + squares[target]
+        return move, None if removal == NO_SQUARE else squares[removal]
 
-    def get_best_move(self, depth):
-        pass
+    def search_root(self, game, turns, depth, previous_best):
+        """Search every root turn to depth and return the best (turn, score)
+
+        The previous iteration's best turn is searched first, or else the table move.
+        Returns (None, None) when there are no turns.
+        """
+        if not turns:
+            return None, None
+        maximizing = game.side == 0
+        best_turn = None
+        best_score = None
+        alpha, beta = -self.WIN_SCORE - 1, self.WIN_SCORE + 1
+        
+        tt_move = previous_best if previous_best is not None else self.tt.probe(game.key) & NO_MOVE
+        for turn in self.order_turns(game, list(turns), tt_move):
+            game.make_move(turn)
+            score = self.minimax(game, depth - 1, alpha, beta, not maximizing)
+            game.unmake_move()
+            if best_turn is None or (score > best_score if maximizing else score < best_score):
+                best_turn, best_score = turn, score
+                if maximizing:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+        
+        self.tt.store(game.key, depth, TT_EXACT, self.score_to_tt(best_score, 0), best_turn)
+        return best_turn, best_score
+
+    def principal_variation(self, game, depth):
+        """Follow table moves from the current position for at most depth turns"""
+        pv = []
+        while len(pv) < depth:
+            move = self.tt.probe(game.key) & NO_MOVE
+            if move == NO_MOVE or move not in game.get_valid_turns():
+                break
+            pv.append(move)
+            game.make_move(move)
+        for move in pv:
+            game.unmake_move()
+        return pv
 
     def minimax(self, game, depth, alpha, beta, is_maximizing):
-        pass
+        """Alpha-beta search of game to depth turns, scored from white's point of view"""
+        self.nodes += 1
+        if not self.nodes & self.CLOCK_CHECK_MASK and time.perf_counter() > self.deadline:
+            raise SearchTimeout
+        
+        game_over, winner = game.is_game_over()
+        if game_over:
+            # Prefer quicker wins and slower losses
+            ply = game.history_length - self.root_ply
+            return self.WIN_SCORE - ply if winner == 'W' else ply - self.WIN_SCORE
+        if self.endgame_db is not None and game.placed >= 18 and not game.pending_removal:
+            probe = self.endgame_db.probe(game.bitboards[game.side], game.bitboards[1 - game.side])
+            if probe is not None:
+                self.endgame_hits += 1
+                return self.endgame_score(game, *probe)
+        if depth <= 0:
+            if not self.quiescence_budget:
+                return self.evaluate(game)
+            self.quiescence_left = self.quiescence_budget
+            return self.quiescence(game, alpha, beta, is_maximizing)
+        
+        key = game.key
+        entry = self.tt.probe(key)
+        if entry and entry >> 17 & 0xFF >= depth:
+            score = self.score_from_tt((entry >> 25) - TranspositionTable.SCORE_OFFSET,
+                                       game.history_length - self.root_ply)
+            flag = entry >> 15 & 3
+            if flag == TT_EXACT or (flag == TT_LOWER and score >= beta) or (flag == TT_UPPER and score <= alpha):
+                return score
+        
+        original_alpha, original_beta = alpha, beta
+        best_turn = NO_MOVE
+        if is_maximizing:
+            best = -self.WIN_SCORE - 1
+            for index, turn in enumerate(self.order_turns(game, game.get_valid_turns(), entry & NO_MOVE)):
+                game.make_move(turn)
+                score = self.minimax(game, depth - 1, alpha, beta, False)
+                game.unmake_move()
+                if score > best:
+                    best = score
+                    best_turn = turn
+                    if best > alpha:
+                        alpha = best
+                        if alpha >= beta:
+                            self.record_cutoff(game, turn, depth, index)
+                            break
+        else:
+            best = self.WIN_SCORE + 1
+            for index, turn in enumerate(self.order_turns(game, game.get_valid_turns(), entry & NO_MOVE)):
+                game.make_move(turn)
+                score = self.minimax(game, depth - 1, alpha, beta, True)
+                game.unmake_move()
+                if score < best:
+                    best = score
+                    best_turn = turn
+                    if best < beta:
+                        beta = best
+                        if alpha >= beta:
+                            self.record_cutoff(game, turn, depth, index)
+                            break
+        
+        if best <= original_alpha:
+            flag = TT_UPPER
+        elif best >= original_beta:
+            flag = TT_LOWER
+        else:
+            flag = TT_EXACT
+        self.tt.store(key, depth, flag, self.score_to_tt(best, game.history_length - self.root_ply), best_turn)
+        return best
+
+    def quiescence(self, game, alpha, beta, is_maximizing):
+        """Search turns that close a mill, and pending removals, until the position is quiet
+
+        The side to move may instead stand pat on the static evaluation, unless it owes a
+        removal. Once the budget set at the horizon is spent, positions are scored statically.
+        The horizon position itself was counted by minimax, so only the positions reached
+        from it count as quiescence nodes.
+        """
+        game_over, winner = game.is_game_over()
+        if game_over:
+            ply = game.history_length - self.root_ply
+            return self.WIN_SCORE - ply if winner == 'W' else ply - self.WIN_SCORE
+        if self.quiescence_left <= 0:
+            return self.evaluate(game)
+        if game.pending_removal:
+            best = -self.WIN_SCORE - 1 if is_maximizing else self.WIN_SCORE + 1
+        else:
+            best = self.evaluate(game)
+            if is_maximizing:
+                alpha = max(alpha, best)
+            else:
+                beta = min(beta, best)
+            if alpha >= beta:
+                return best
+        
+        turns = [turn for turn in game.iter_turns() if turn >> 10 != NO_SQUARE]
+        for turn in self.order_turns(game, turns, NO_MOVE):
+            self.nodes += 1
+            self.quiescence_nodes += 1
+            self.quiescence_left -= 1
+            if not self.nodes & self.CLOCK_CHECK_MASK and time.perf_counter() > self.deadline:
+                raise SearchTimeout
+            game.make_move(turn)
+            score = self.quiescence(game, alpha, beta, not is_maximizing)
+            game.unmake_move()
+            if is_maximizing:
+                if score > best:
+                    best = score
+                    alpha = max(alpha, score)
+            elif score < best:
+                best = score
+                beta = min(beta, score)
+            if alpha >= beta:
+                break
+        return best
+
+    def evaluate(self, game):
+        """Static evaluation of game with this engine's weights, through the evaluation cache"""
+        cache = self.eval_cache
+        if cache is None:
+            return game.evaluate_position(self.weights)
+        score = cache.probe(game.key)
+        if score is None:
+            score = game.evaluate_position(self.weights)
+            cache.store(game.key, score)
+        return score
+
+    def endgame_score(self, game, result, distance):
+        """Search score of a solved position, from white's point of view
+
+        Wins without a known distance count as MAX_DEPTH turns away.
+        """
+        if result == 'draw':
+            return 0
+        ply = game.history_length - self.root_ply
+        score = self.WIN_SCORE - ply - (self.MAX_DEPTH if distance is None else distance)
+        return score if (result == 'win') == (game.side == 0) else -score
+
+    def order_turns(self, game, turns, tt_move):
+        """Sort turns so the likeliest cutoffs come first
+
+        The table move leads, then turns that close a mill (taking first the pieces that
+        threaten to close a mill of their own), then turns that fill a gap of an opponent
+        two-in-a-row, then this ply's killer moves, then by history score.
+        """
+        side = game.side
+        threats = game.threat_pieces(side ^ 1)
+        blocks = game.mill_gaps(side ^ 1)
+        ply = game.history_length - self.root_ply
+        first_killer, second_killer = self.killers[ply] if ply < self.MAX_PLY else (NO_MOVE, NO_MOVE)
+        history_scores = self.history_scores
+        side_offset = side << 10
+        
+        def priority(turn):
+            if turn == tt_move:
+                return self.TT_MOVE_BONUS
+            removal = turn >> 10
+            score = 0
+            if removal != NO_SQUARE:
+                score = self.MILL_BONUS
+                if threats >> removal & 1:
+                    score += self.THREAT_REMOVAL_BONUS
+            if blocks >> (turn >> 5 & 31) & 1:
+                score += self.BLOCK_BONUS
+            if turn == first_killer:
+                score += 2 * self.KILLER_BONUS
+            elif turn == second_killer:
+                score += self.KILLER_BONUS
+            return score + history_scores[side_offset | turn & 0x3FF]
+        
+        turns.sort(key=priority, reverse=True)
+        return turns
+
+    def record_cutoff(self, game, turn, depth, index):
+        """Update the cutoff counters and, for a quiet turn, the killer and history tables"""
+        self.cutoffs += 1
+        if not index:
+            self.first_move_cutoffs += 1
+        if turn >> 10 != NO_SQUARE:
+            return  # Mills are ordered first anyway
+        ply = game.history_length - self.root_ply
+        if ply < self.MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != turn:
+                killers[1] = killers[0]
+                killers[0] = turn
+        slot = game.side << 10 | turn & 0x3FF
+        self.history_scores[slot] = min(self.history_scores[slot] + depth * depth, self.KILLER_BONUS - 1)
+
+    def reset_ordering(self):
+        """Clear the killer moves, history scores and cutoff counters before a new search"""
+        for killers in self.killers:
+            killers[0] = killers[1] = NO_MOVE
+        self.history_scores = array('i', bytes(4 * 2048))
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.iteration_nodes = []
+
+    def ordering_stats(self):
+        """Cutoff counters of the last get_best_move call and the effective branching factor
+
+        The branching factor is the growth in nodes between the last two completed
+        iterations.
+        """
+        nodes = self.iteration_nodes
+        growth = [nodes[i] - nodes[i - 1] for i in range(1, len(nodes))]
+        return {
+            'cutoffs': self.cutoffs,
+            'first_move_cutoffs': self.first_move_cutoffs,
+            'first_move_cutoff_rate': self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0,
+            'branching_factor': growth[-1] / growth[-2] if len(growth) >= 2 and growth[-2] else 0.0,
+        }
+
+    def score_to_tt(self, score, ply):
+        """Make win scores count from the node instead of the root, so they hold at any ply"""
+        if score > self.WIN_SCORE // 2:
+            return score + ply
+        if score < -self.WIN_SCORE // 2:
+            return score - ply
+        return score
+
+    def score_from_tt(self, score, ply):
+        """Inverse of score_to_tt for a node at ply"""
+        if score > self.WIN_SCORE // 2:
+            return score - ply
+        if score < -self.WIN_SCORE // 2:
+            return score + ply
+        return score
+
+
+ENDGAME_DATABASE = 'endgame.db'  # Solved endgames the CLI probes when the file exists, see endgame_db.py
+OPENING_BOOK = 'opening_book.bin'  # Placement book the CLI plays from when the file exists, see opening_book.py
 
 
 def main():
@@ -625,6 +1488,12 @@ def main():
 
     game = Game()
     ai = MinimaxAI(game)
+    if os.path.exists(ENDGAME_DATABASE):
+        from endgame_db import EndgameDatabase
+        ai.endgame_db = EndgameDatabase(ENDGAME_DATABASE)
+    if os.path.exists(OPENING_BOOK):
+        from opening_book import OpeningBook
+        ai.book = OpeningBook(OPENING_BOOK)
     
     print("Welcome to the Mill Game Solver!")
     print("This is a strategic board game where players try to form mills (three-in-a-row)")
@@ -673,6 +1542,7 @@ def main():
                         print(message)
                         # If mill was formed, require piece removal
                         if "Mill formed" in message:
+                            print("You may remove: " + ' '.join(f"({x}, {y})" for x, y in game.legal_removals()))
                             piece_removed = False
                             while not piece_removed:
                                 try:
@@ -703,6 +1573,7 @@ def main():
                         print(message)
                         # If mill was formed, require piece removal
                         if "Mill formed" in message:
+                            print("You may remove: " + ' '.join(f"({x}, {y})" for x, y in game.legal_removals()))
                             piece_removed = False
                             while not piece_removed:
                                 try:
@@ -721,11 +1592,24 @@ def main():
                     print("Invalid input. Please enter numbers between 0 and 6.")
         
         elif choice == '2':  # Computer decides
-            depth = int(input("Enter search depth (1-5 recommended): "))
+            time_ms = int(input("Enter thinking time in milliseconds (e.g. 1000): "))
             print(f"\nComputer ({game.player}) is thinking...")
-            best_move = ai.get_best_move(depth)
+            best_move = ai.get_best_move(time_ms=time_ms)
             
             if best_move:
+                best_move, removal = best_move
+                if ai.book_hit:
+                    print("Book move")
+                else:
+                    print(f"Searched {ai.nodes} nodes ({ai.quiescence_nodes} in quiescence) to depth "
+                          f"{ai.depth_reached} in {ai.elapsed:.2f}s ({ai.nodes_per_second:,.0f} nodes/s)")
+                    stats = ai.ordering_stats()
+                    print(f"First-move cutoffs {stats['first_move_cutoff_rate']:.0%} of {stats['cutoffs']}, "
+                          f"branching factor {stats['branching_factor']:.2f}")
+                if ai.endgame_hits:
+                    print(f"{ai.endgame_hits} positions answered by the endgame database")
+                if ai.eval_cache is not None and not ai.book_hit:
+                    print(f"Evaluation cache hit rate {ai.eval_cache.stats()['hit_rate']:.0%}")
                 if best_move[0] == 'place':
                     success, message = game.place(best_move[1], best_move[2])
                     print(f"Computer places piece at ({best_move[1]}, {best_move[2]})")
@@ -735,43 +1619,21 @@ def main():
                 
                 if success:
                     print(message)
-                    # If mill was formed, computer removes a piece
+                    # If mill was formed, computer removes the piece chosen by the search
                     if "Mill formed" in message:
-                        print("Mill detected - attempting piece removal...")
-                        # Aggressive AI for piece removal - prioritize opponent mill threats
-                        opponent = 'B' if game.player == 'W' else 'W'
-                        piece_removed = False
-                        
-                        # First, try to remove opponent pieces that can form mills next turn
-                        mill_threats = game.get_opponent_mill_threats(game.player)
-                        for x, y in mill_threats:
-                            if game.board[y][x] == opponent:
-                                success, message = game.remove_piece(x, y)
-                                if success:
-                                    print(f"Computer removes threatening piece at ({x}, {y})")
-                                    piece_removed = True
-                                    break
-                        
-                        # If no mill threats removed, remove any available piece
-                        if not piece_removed:
-                            for x in range(7):
-                                for y in range(7):
-                                    if game.board[y][x] == opponent:
-                                        success, message = game.remove_piece(x, y)
-                                        if success:
-                                            print(f"Computer removes piece at ({x}, {y})")
-                                            piece_removed = True
-                                            break
-                                if piece_removed:
-                                    break
-                        
-                        if not piece_removed:
+                        if removal is not None:
+                            success, message = game.remove_piece(*removal)
+                            print(f"Computer removes piece at ({removal[0]}, {removal[1]})")
+                        else:
                             print("Computer could not remove any opponent pieces")
             else:
                 print("No valid moves found!")
         
         elif choice == '3':  # Undo
             success, message = game.undo()
+            # Take back the whole turn, not just the removal that completed it
+            while success and game.pending_removal:
+                game.undo()
             if not success:
                 print(f"Error: {message}")
             else:
@@ -0,0 +1,149 @@
+"""Opening book for the placement phase
+
+The builder walks every placement position up to a number of plies from the start,
+merges positions that are symmetric images of each other (see symmetry.py) and searches
+each remaining one with MinimaxAI. The book stores, per position, the best turn as seen
+from its canonical image, keyed by the Zobrist key of that image.
+
+File layout, little-endian: MAGIC, format version, reserved, entry count (HEADER), then
+the keys as uint64 in increasing order, then one uint16 encoded turn per key.
+
+    python opening_book.py --plies 4 --depth 6 --out opening_book.bin
+"""
+import argparse
+import os
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+
+from main import Game, MinimaxAI, zobrist_key
+from symmetry import INVERSES, canonicalize, transform_move
+
+MAGIC = b'MILLBOOK'
+VERSION = 1
+HEADER = struct.Struct('<8sHHI')
+
+
+def canonical_position(game):
+    """Position tuple of the canonical image of game's position and the symmetry mapping to it"""
+    white, black, symmetry = canonicalize(*game.bitboards)
+    return (white, black, game.placed, game.side, game.pending_removal), symmetry
+
+
+class OpeningBook:
+    """Sorted book entries loaded from a file, looked up by binary search"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            magic, version, _, count = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not an opening book")
+            if version != VERSION:
+                raise ValueError(f"{path} has format version {version}, expected {VERSION}")
+            self.keys = array('Q')
+            self.keys.fromfile(f, count)
+            self.moves = array('H')
+            self.moves.fromfile(f, count)
+        if sys.byteorder == 'big':
+            self.keys.byteswap()
+            self.moves.byteswap()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def probe(self, game):
+        """Book turn for game's position, or None if the position is not in the book"""
+        if not game.is_placement_phase() or game.pending_removal:
+            return None
+        position, symmetry = canonical_position(game)
+        key = zobrist_key(*position)
+        index = bisect_left(self.keys, key)
+        if index == len(self.keys) or self.keys[index] != key:
+            return None
+        return transform_move(self.moves[index], INVERSES[symmetry])
+
+
+def write_book(path, entries):
+    """Write a {canonical key: canonical turn} dict as a book file"""
+    keys = array('Q', sorted(entries))
+    moves = array('H', (entries[key] for key in keys))
+    if sys.byteorder == 'big':
+        keys.byteswap()
+        moves.byteswap()
+    with open(path + '.tmp', 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(keys)))
+        keys.tofile(f)
+        moves.tofile(f)
+    os.replace(path + '.tmp', path)
+
+
+def book_positions(plies):
+    """Canonical placement positions reachable within plies turns of the start, one per class"""
+    game = Game()
+    game.start()
+    positions = {}
+    frontier = [game.position()]
+    for ply in range(plies + 1):
+        next_frontier = []
+        for position in frontier:
+            game.set_position(position)
+            canonical, _ = canonical_position(game)
+            key = zobrist_key(*canonical)
+            if key in positions:
+                continue
+            positions[key] = canonical
+            if ply == plies:
+                continue
+            for turn in game.get_valid_turns():
+                game.make_move(turn)
+                if game.is_placement_phase():
+                    next_frontier.append(game.position())
+                game.unmake_move()
+        frontier = next_frontier
+    return positions
+
+
+def search_position(position, depth, time_ms):
+    """Best turn of a canonical position, searched from scratch"""
+    game = Game()
+    game.set_position(position)
+    ai = MinimaxAI(game)
+    ai.get_best_move(depth=depth, time_ms=time_ms)
+    return ai.pv[0] if ai.pv else None
+
+
+def build_book(path, plies, depth=None, time_ms=None, workers=None):
+    """Search every book position and write the book; returns the number of entries"""
+    positions = book_positions(plies)
+    workers = workers or os.cpu_count() or 1
+    entries = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        keys = list(positions)
+        for key, turn in zip(keys, executor.map(search_position, (positions[key] for key in keys),
+                                                [depth] * len(keys), [time_ms] * len(keys), chunksize=8)):
+            if turn is not None:
+                entries[key] = turn
+    write_book(path, entries)
+    return len(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a placement-phase opening book by deep search")
+    parser.add_argument('--plies', type=int, default=3, help="Turns from the start covered by the book")
+    parser.add_argument('--depth', type=int, default=6, help="Search depth per position")
+    parser.add_argument('--time-ms', type=int, default=None, help="Search time per position instead of a depth")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--out', default='opening_book.bin', help="Book file to write")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    depth = None if args.time_ms is not None else args.depth
+    count = build_book(args.out, args.plies, depth, args.time_ms, args.workers)
+    print(f"Wrote {count} positions to {args.out} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
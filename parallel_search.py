@@ -0,0 +1,219 @@
+"""Root-parallel search for MinimaxAI on a process pool
+
+ParallelMinimaxAI runs the same iterative deepening as MinimaxAI, but each iteration
+scores the root turns on worker processes, one turn per task. The first turn (the best of
+the previous iteration) is searched alone, then the others in parallel. Workers share
+the best root score found so far and use it as their alpha bound, so a turn that cannot
+beat it is cut off early. Positions are sent as Game.position() tuples and each worker
+keeps its own MinimaxAI, with a warm transposition table, between tasks. Killer moves
+and history scores carry over between the tasks of one get_best_move call only. The
+workers' node and cutoff counters are added up in the parent's statistics.
+
+    python parallel_search.py --depth 5 --workers 2 4 8 16
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Value
+
+from main import EVALUATION_WEIGHTS, NO_MOVE, TT_EXACT, Game, MinimaxAI, SearchTimeout
+
+# Worker side: the process's engine and the shared root bound, set by _init_worker, and
+# the search whose killer moves and history scores the engine holds
+_worker_ai = None
+_worker_bound = None
+_worker_search = None
+
+
+def _init_worker(bound, tt_size_mb, endgame_path, weights, quiescence_nodes, eval_cache_mb):
+    global _worker_ai, _worker_bound
+    endgame_db = None
+    if endgame_path is not None:
+        from endgame_db import EndgameDatabase
+        endgame_db = EndgameDatabase(endgame_path)
+    _worker_ai = MinimaxAI(Game(), tt_size_mb, endgame_db, weights,
+                           quiescence_nodes=quiescence_nodes, eval_cache_mb=eval_cache_mb)
+    _worker_bound = bound
+
+
+def search_turn(position, turn, depth, deadline, search):
+    """Score one root turn of position to depth on a worker
+
+    The shared bound holds the best score found for the side to move, from its own point
+    of view. deadline is a time.time() value or None. search numbers the get_best_move
+    call; the move ordering state is cleared when it changes. Returns (turn, score,
+    bound, pv, counters) with score from white's point of view, or None for the score if
+    time ran out, bound the value of the shared bound the turn was searched against, and
+    counters the (nodes, quiescence_nodes, endgame_hits, cutoffs, first_move_cutoffs) of
+    this turn. The score is exact only if it beats bound; otherwise the turn is no better.
+    """
+    global _worker_search
+    ai = _worker_ai
+    game = ai.game
+    game.set_position(position)
+    if search != _worker_search:
+        ai.reset_ordering()
+        _worker_search = search
+    ai.nodes = ai.quiescence_nodes = ai.endgame_hits = ai.cutoffs = ai.first_move_cutoffs = 0
+    ai.root_ply = 0
+    ai.deadline = float('inf') if deadline is None else time.perf_counter() + deadline - time.time()
+    maximizing = game.side == 0
+    bound = _worker_bound.value
+    if maximizing:
+        alpha, beta = bound, MinimaxAI.WIN_SCORE + 1
+    else:
+        alpha, beta = -MinimaxAI.WIN_SCORE - 1, -bound
+
+    game.make_move(turn)
+    try:
+        score = ai.minimax(game, depth - 1, alpha, beta, not maximizing)
+    except SearchTimeout:
+        score = None
+    finally:
+        ai.deadline = float('inf')
+    counters = (ai.nodes, ai.quiescence_nodes, ai.endgame_hits, ai.cutoffs, ai.first_move_cutoffs)
+    if score is None:
+        return turn, None, bound, [], counters
+
+    with _worker_bound.get_lock():
+        if (score if maximizing else -score) > _worker_bound.value:
+            _worker_bound.value = score if maximizing else -score
+    return turn, score, bound, [turn] + ai.principal_variation(game, depth - 1), counters
+
+
+class ParallelMinimaxAI(MinimaxAI):
+    """MinimaxAI whose root turns are searched on a pool of worker processes
+
+    endgame_path is an endgame_db file that each worker maps. weights, quiescence_nodes
+    and eval_cache_mb configure the workers' engines as they do a MinimaxAI. Call close()
+    to stop the pool.
+    """
+
+    def __init__(self, game, workers=None, tt_size_mb=16, endgame_path=None, weights=EVALUATION_WEIGHTS,
+                 quiescence_nodes=MinimaxAI.QUIESCENCE_NODES, eval_cache_mb=4):
+        super().__init__(game, tt_size_mb, weights=weights, quiescence_nodes=quiescence_nodes,
+                         eval_cache_mb=eval_cache_mb)
+        self.workers = workers or os.cpu_count() or 1
+        self.bound = Value('q', 0)  # Best root score so far for the side to move, shared with workers
+        self.executor = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                            initargs=(self.bound, tt_size_mb, endgame_path, weights,
+                                                      quiescence_nodes, eval_cache_mb))
+        self.root_pv = []
+        self.search = 0  # Number of the running get_best_move call, sent with each task
+
+    def start(self):
+        """Start every worker process now rather than on the first search"""
+        list(self.executor.map(time.sleep, [0.05] * self.workers))
+
+    def close(self):
+        """Shut the worker pool down"""
+        self.executor.shutdown()
+
+    def reset_ordering(self):
+        """Clear the counters and have the workers clear their move ordering state too"""
+        super().reset_ordering()
+        self.search += 1
+
+    def search_root(self, game, turns, depth, previous_best):
+        """Search every root turn to depth on the pool and return the best (turn, score)
+
+        Returns (None, None) when there are no turns.
+        """
+        if not turns:
+            return None, None
+        maximizing = game.side == 0
+        tt_move = previous_best if previous_best is not None else self.tt.probe(game.key) & NO_MOVE
+        turns = self.order_turns(game, list(turns), tt_move)
+        position = game.position()
+        deadline = None
+        if self.deadline != float('inf'):
+            deadline = time.time() + self.deadline - time.perf_counter()
+
+        self.bound.value = -self.WIN_SCORE - 1
+        results = [self.executor.submit(search_turn, position, turns[0], depth, deadline, self.search).result()]
+        jobs = [self.executor.submit(search_turn, position, turn, depth, deadline, self.search)
+                for turn in turns[1:]]
+        results.extend(job.result() for job in jobs)
+
+        best_turn = None
+        best_score = None
+        timed_out = False
+        for turn, score, bound, pv, (nodes, quiescence_nodes, endgame_hits, cutoffs, first_move_cutoffs) in results:
+            self.nodes += nodes
+            self.quiescence_nodes += quiescence_nodes
+            self.endgame_hits += endgame_hits
+            self.cutoffs += cutoffs
+            self.first_move_cutoffs += first_move_cutoffs
+            if score is None:
+                timed_out = True
+            elif (score if maximizing else -score) <= bound:
+                continue  # Failed low against another turn's exact score, so it is no better
+            elif best_turn is None or (score > best_score if maximizing else score < best_score):
+                best_turn, best_score, self.root_pv = turn, score, pv
+        if timed_out:
+            raise SearchTimeout
+
+        self.tt.store(game.key, depth, TT_EXACT, self.score_to_tt(best_score, 0), best_turn)
+        return best_turn, best_score
+
+    def principal_variation(self, game, depth):
+        """Root turn and the worker's continuation from the last completed iteration"""
+        return self.root_pv[:depth]
+
+
+def random_opening(plies, seed):
+    """Game after plies random turns from the start, repeatable for a given seed"""
+    rng = random.Random(seed)
+    game = Game()
+    game.start()
+    for _ in range(plies):
+        turns = game.get_valid_turns()
+        if not turns or game.is_game_over()[0]:
+            break
+        game.make_move(rng.choice(turns))
+    return game
+
+
+def scaling_report(position, depth, worker_counts):
+    """Time a fixed-depth search serially and with each worker count
+
+    Returns one dict per run with the time, nodes, speedup over the serial search and
+    efficiency (speedup divided by the number of workers).
+    """
+    game = Game()
+    game.set_position(position)
+    serial = MinimaxAI(game)
+    serial.get_best_move(depth=depth)
+    rows = [{'workers': 1, 'seconds': serial.elapsed, 'nodes': serial.nodes, 'speedup': 1.0, 'efficiency': 1.0}]
+    for workers in worker_counts:
+        game.set_position(position)
+        ai = ParallelMinimaxAI(game, workers)
+        ai.start()
+        ai.get_best_move(depth=depth)
+        ai.close()
+        speedup = serial.elapsed / ai.elapsed if ai.elapsed > 0 else 0.0
+        rows.append({'workers': workers, 'seconds': ai.elapsed, 'nodes': ai.nodes,
+                     'speedup': speedup, 'efficiency': speedup / workers})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the scaling of the parallel root search")
+    parser.add_argument('--depth', type=int, default=5, help="Search depth in turns")
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4, 8, 16], help="Worker counts to try")
+    parser.add_argument('--opening', type=int, default=8, help="Random turns played before the search")
+    parser.add_argument('--seed', type=int, default=1, help="Seed of the random opening")
+    args = parser.parse_args()
+
+    position = random_opening(args.opening, args.seed).position()
+    print(f"{os.cpu_count()} CPUs, depth {args.depth}")
+    print(f"{'workers':>7} {'seconds':>9} {'nodes':>10} {'speedup':>8} {'efficiency':>10}")
+    for row in scaling_report(position, args.depth, args.workers):
+        print(f"{row['workers']:>7} {row['seconds']:>9.2f} {row['nodes']:>10} "
+              f"{row['speedup']:>8.2f} {row['efficiency']:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
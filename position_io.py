@@ -0,0 +1,225 @@
+"""Compact position encoding and streaming files of positions and game records
+
+A position (a Game.position() tuple) packs into 55 bits, stored as POSITION_BYTES
+little-endian bytes: white occupancy in bits 0-23, black in bits 24-47, pieces placed
+in bits 48-52, the side to move in bit 53 and a pending removal in bit 54.
+
+A record file is HEADER followed by records, each a packed position, a uint16 count and
+that many uint16 encoded turns played from it. A record with no turns is just a position.
+RecordWriter and iter_records stream such files, so they can hold millions of records.
+
+The text form, for debugging, lists the squares column by column (a to g, each from row 1
+up, see main.square_name) as W, B or '.', then the side to move, pieces placed and '-'
+or 'x' for a pending removal:
+
+    W../.../.../.....B/.../.../... w 2 -
+
+A text record is a position, ';' and the turns in main.move_notation form.
+
+    python position_io.py records.bin
+    python position_io.py --from-text records.txt --out records.bin
+"""
+import argparse
+import struct
+import sys
+from array import array
+
+from main import NO_MOVE, NO_SQUARE, SQUARE_NAMES, SQUARES, Game, encode_move, move_notation
+
+POSITION_BYTES = 7
+MAGIC = b'MILLRECS'
+VERSION = 1
+HEADER = struct.Struct('<8sHH')
+COUNT = struct.Struct('<H')
+
+# Square indices column by column, as the text form lists them
+COLUMNS = tuple(tuple(square for square, (x, y) in enumerate(SQUARES) if x == column) for column in range(7))
+
+
+def pack_position(position):
+    """55-bit integer of a position tuple"""
+    white, black, placed, side, pending_removal = position
+    return white | black << 24 | placed << 48 | side << 53 | bool(pending_removal) << 54
+
+
+def unpack_position(packed):
+    """Position tuple of a pack_position integer; raises ValueError if it is not one"""
+    white = packed & 0xFFFFFF
+    black = packed >> 24 & 0xFFFFFF
+    placed = packed >> 48 & 31
+    if white & black or placed > 18 or packed >> 55:
+        raise ValueError(f"invalid packed position {packed:#x}")
+    return white, black, placed, packed >> 53 & 1, bool(packed >> 54 & 1)
+
+
+def format_position(position):
+    """Text form of a position tuple"""
+    white, black, placed, side, pending_removal = position
+    parts = (''.join('.WB'[(white >> square & 1) + 2 * (black >> square & 1)] for square in column)
+             for column in COLUMNS)
+    return f"{'/'.join(parts)} {'wb'[side]} {placed} {'x' if pending_removal else '-'}"
+
+
+def parse_position(text):
+    """Position tuple of format_position text; raises ValueError if malformed"""
+    try:
+        board, side, placed, pending = text.split()
+        columns = board.split('/')
+        placed = int(placed)
+    except ValueError:
+        raise ValueError(f"malformed position {text!r}") from None
+    if (len(columns) != len(COLUMNS) or any(len(part) != len(column) for part, column in zip(columns, COLUMNS))
+            or side not in ('w', 'b') or not 0 <= placed <= 18 or pending not in ('-', 'x')):
+        raise ValueError(f"malformed position {text!r}")
+    white = black = 0
+    for part, column in zip(columns, COLUMNS):
+        for piece, square in zip(part, column):
+            if piece == 'W':
+                white |= 1 << square
+            elif piece == 'B':
+                black |= 1 << square
+            elif piece != '.':
+                raise ValueError(f"unknown piece {piece!r} in {text!r}")
+    return white, black, placed, 'wb'.index(side), pending == 'x'
+
+
+def parse_move(text):
+    """Encoded move of main.move_notation text like 'd2', 'a1-a4xg7' or 'xd7'"""
+    move, _, removal = text.partition('x')
+    source, _, target = move.rpartition('-')
+    try:
+        return encode_move(SQUARE_NAMES[source] if source else NO_SQUARE,
+                           SQUARE_NAMES[target] if target else NO_SQUARE,
+                           SQUARE_NAMES[removal] if removal else NO_SQUARE)
+    except KeyError:
+        raise ValueError(f"malformed move {text!r}") from None
+
+
+def format_record(position, moves=()):
+    """Text line of a record: the position, then the turns if there are any"""
+    text = format_position(position)
+    return text + '; ' + ' '.join(move_notation(move) for move in moves) if moves else text
+
+
+def parse_record(line):
+    """(position, moves) of a format_record line"""
+    position, _, moves = line.partition(';')
+    return parse_position(position), [parse_move(move) for move in moves.split()]
+
+
+def game_record(game):
+    """(position, turns) replaying game's undo history from where it started
+
+    A move and its removal made separately through place() or move() and remove_piece()
+    become one turn. A last move still waiting for its removal is left out.
+    """
+    records = [game.history[index] for index in range(game.history_length)]
+    pending_removal = game.pending_removal
+    for _ in records:
+        game.unmake_move()
+    position = game.position()
+    # Play the history back the way it was made, handing the turn back after split moves
+    for index, record in enumerate(records):
+        game.make_move(record & NO_MOVE)
+        if index + 1 < len(records):
+            split = records[index + 1] >> 15 & 1 == record >> 15 & 1
+        else:
+            split = pending_removal
+        if split:
+            game.keep_turn_for_removal()
+    if pending_removal and records:
+        records.pop()
+    turns = []
+    movers = []
+    for record in records:
+        move = record & NO_MOVE
+        mover = record >> 15 & 1
+        removal_only = move & 0x3FF == NO_SQUARE | NO_SQUARE << 5
+        if removal_only and movers and movers[-1] == mover and turns[-1] >> 10 == NO_SQUARE:
+            turns[-1] = turns[-1] & 0x3FF | move >> 10 << 10  # Removal of the mill closed by the move before
+        else:
+            turns.append(move)
+            movers.append(mover)
+    return position, turns
+
+
+def replay(position, moves):
+    """Game at the end of a record, with its turns on the undo stack"""
+    game = Game()
+    game.set_position(position)
+    for move in moves:
+        game.make_move(move)
+    return game
+
+
+class RecordWriter:
+    """Stream records to a new file; use as a context manager or call close()"""
+
+    def __init__(self, path):
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, 0))
+        self.count = 0  # Records written
+
+    def write(self, position, moves=()):
+        """Append one record"""
+        turns = array('H', moves)
+        if sys.byteorder == 'big':
+            turns.byteswap()
+        self.file.write(pack_position(position).to_bytes(POSITION_BYTES, 'little') + COUNT.pack(len(turns)))
+        self.file.write(turns.tobytes())
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_records(path):
+    """Yield the (position, moves) records of a file written by RecordWriter"""
+    with open(path, 'rb') as f:
+        magic, version, _ = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a record file")
+        if version != VERSION:
+            raise ValueError(f"{path} has format version {version}, expected {VERSION}")
+        size = POSITION_BYTES + COUNT.size
+        while head := f.read(size):
+            if len(head) != size:
+                raise ValueError(f"{path} ends inside a record")
+            count, = COUNT.unpack_from(head, POSITION_BYTES)
+            moves = array('H')
+            moves.frombytes(f.read(2 * count))
+            if len(moves) != count:
+                raise ValueError(f"{path} ends inside a record")
+            if sys.byteorder == 'big':
+                moves.byteswap()
+            yield unpack_position(int.from_bytes(head[:POSITION_BYTES], 'little')), moves.tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print a record file as text, or build one from text")
+    parser.add_argument('path', nargs='?', help="Record file to print")
+    parser.add_argument('--from-text', help="Text file with one record per line to convert")
+    parser.add_argument('--out', default='records.bin', help="Record file written by --from-text")
+    args = parser.parse_args()
+
+    if args.from_text:
+        with open(args.from_text) as f, RecordWriter(args.out) as writer:
+            for line in f:
+                if line.strip():
+                    writer.write(*parse_record(line))
+        print(f"Wrote {writer.count} records to {args.out}")
+    elif args.path:
+        for position, moves in iter_records(args.path):
+            print(format_record(position, moves))
+    else:
+        parser.error("give a record file or --from-text")
+
+
+if __name__ == "__main__":
+    main()
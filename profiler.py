@@ -0,0 +1,190 @@
+"""Opt-in profiling of MinimaxAI searches
+
+SearchProfiler wraps the methods of one engine and its Game while it is active, as a
+context manager, and removes the wrappers when it exits. Nothing in main.py knows about
+it, so an engine that is not being profiled runs exactly the code it always does.
+
+While active it records, per search ply, the nodes visited by minimax (the root once
+per iteration) and by the quiescence search, the beta cutoffs and how many came from
+the first turn tried, and for every wrapped method the calls, total time (outermost
+calls only, so recursion is not counted twice) and self time. report() returns all of
+it as a dict, write_json() saves that, and write_collapsed() saves the self times per
+call stack in the collapsed format read by flamegraph.pl and speedscope.
+
+Generator methods such as Game.iter_turns are not wrapped: their work happens while the
+caller consumes them and is counted there.
+
+    python profiler.py --position movement --depth 5 --json profile.json --collapsed profile.folded
+"""
+import argparse
+import inspect
+import json
+import time
+from collections import defaultdict
+
+from bench import POSITIONS
+from main import Game, MinimaxAI
+
+
+class SearchProfiler:
+    """Instrument an engine for the duration of a with block
+
+        with SearchProfiler(ai) as profiler:
+            ai.get_best_move(depth=5)
+        profiler.write_json('profile.json')
+    """
+
+    def __init__(self, ai):
+        self.ai = ai
+        self.nodes_by_ply = defaultdict(int)
+        self.quiescence_nodes_by_ply = defaultdict(int)
+        self.cutoffs_by_ply = defaultdict(int)
+        self.first_move_cutoffs_by_ply = defaultdict(int)
+        self.calls = defaultdict(int)  # Method name -> calls
+        self.total_time = defaultdict(float)  # Method name -> seconds in outermost calls
+        self.self_time = defaultdict(float)  # Method name -> seconds outside wrapped callees
+        self.stack_time = defaultdict(float)  # 'outer;...;inner' stack -> self seconds
+        self.stack = []  # Names of the wrapped calls in progress
+        self.child_time = [0.0]  # Time spent in wrapped callees, per level of stack
+        self.wrapped = []  # (object, attribute) pairs to remove on exit
+
+    def __enter__(self):
+        ai = self.ai
+        hooks = {
+            'search_root': lambda game, *rest: self.count(self.nodes_by_ply, game),
+            'minimax': lambda game, *rest: self.count(self.nodes_by_ply, game),
+            'quiescence': self.count_quiescence,
+            'record_cutoff': self.count_cutoff,
+        }
+        for target, cls in ((ai, type(ai)), (ai.game, type(ai.game))):
+            for name, function in inspect.getmembers(cls, inspect.isfunction):
+                if name.startswith('__') or inspect.isgeneratorfunction(function):
+                    continue
+                label = f"{function.__qualname__.split('.')[0]}.{name}"
+                setattr(target, name, self.wrap(label, getattr(target, name), hooks.get(name)))
+                self.wrapped.append((target, name))
+        return self
+
+    def __exit__(self, *exc_info):
+        for target, name in self.wrapped:
+            delattr(target, name)
+        self.wrapped = []
+
+    def count(self, counter, game):
+        counter[game.history_length - self.ai.root_ply] += 1
+
+    def count_quiescence(self, game, *rest):
+        # The horizon call is a minimax node; only positions searched past it are counted
+        if self.stack[-1:] == ['MinimaxAI.quiescence']:
+            self.count(self.quiescence_nodes_by_ply, game)
+
+    def count_cutoff(self, game, turn, depth, index):
+        ply = game.history_length - self.ai.root_ply
+        self.cutoffs_by_ply[ply] += 1
+        if not index:
+            self.first_move_cutoffs_by_ply[ply] += 1
+
+    def wrap(self, label, method, hook):
+        """Timing wrapper around a bound method; hook, if given, sees the arguments first"""
+        stack = self.stack
+        child_time = self.child_time
+        timer = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            if hook is not None:
+                hook(*args)
+            outermost = label not in stack
+            stack.append(label)
+            child_time.append(0.0)
+            start = timer()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = timer() - start
+                own = elapsed - child_time.pop()
+                child_time[-1] += elapsed
+                self.calls[label] += 1
+                self.self_time[label] += own
+                if outermost:
+                    self.total_time[label] += elapsed
+                self.stack_time[';'.join(stack)] += own
+                stack.pop()
+
+        return wrapper
+
+    def report(self):
+        """Search statistics per ply and time per method, as a JSON-ready dict"""
+        plies = range(max(self.nodes_by_ply, default=-1) + 1)
+        nodes = [self.nodes_by_ply[ply] for ply in plies]
+        cutoffs = [self.cutoffs_by_ply[ply] for ply in plies]
+        first_move = [self.first_move_cutoffs_by_ply[ply] for ply in plies]
+        return {
+            'search': {
+                'nodes_by_ply': nodes,
+                'quiescence_nodes_by_ply': [self.quiescence_nodes_by_ply[ply]
+                                            for ply in range(max(self.quiescence_nodes_by_ply, default=-1) + 1)],
+                # Nodes at each ply per node at the ply before
+                'branching_factor_by_ply': [nodes[ply] / nodes[ply - 1] if nodes[ply - 1] else 0.0
+                                            for ply in range(1, len(nodes))],
+                'cutoffs_by_ply': cutoffs,
+                'first_move_cutoff_rate_by_ply': [first / total if total else 0.0
+                                                  for first, total in zip(first_move, cutoffs)],
+                'cutoffs': sum(cutoffs),
+                'first_move_cutoffs': sum(first_move),
+            },
+            'functions': {
+                label: {
+                    'calls': self.calls[label],
+                    'total_ms': self.total_time[label] * 1000,
+                    'self_ms': self.self_time[label] * 1000,
+                }
+                for label in sorted(self.calls, key=self.self_time.get, reverse=True)
+            },
+        }
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+    def write_collapsed(self, path):
+        """Write 'outer;...;inner microseconds' lines of self time, one per call stack"""
+        with open(path, 'w') as f:
+            for stack, seconds in sorted(self.stack_time.items()):
+                microseconds = round(seconds * 1e6)
+                if microseconds:
+                    f.write(f"{stack} {microseconds}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile one search and report where the time goes")
+    parser.add_argument('--position', default='movement', choices=sorted(POSITIONS), help="Position to search")
+    parser.add_argument('--depth', type=int, default=4, help="Search depth in turns")
+    parser.add_argument('--json', help="Write the full report to this JSON file")
+    parser.add_argument('--collapsed', help="Write collapsed stacks for a flamegraph to this file")
+    parser.add_argument('--top', type=int, default=15, help="Methods to list by self time")
+    args = parser.parse_args()
+
+    game = Game()
+    game.set_position(POSITIONS[args.position])
+    ai = MinimaxAI(game)
+    with SearchProfiler(ai) as profiler:
+        ai.get_best_move(depth=args.depth)
+    report = profiler.report()
+
+    search = report['search']
+    print(f"{'ply':>3} {'nodes':>10} {'branching':>9} {'cutoffs':>8} {'first':>6}")
+    for ply, nodes in enumerate(search['nodes_by_ply']):
+        branching = search['branching_factor_by_ply'][ply - 1] if ply else 0.0
+        print(f"{ply:>3} {nodes:>10} {branching:>9.2f} {search['cutoffs_by_ply'][ply]:>8} "
+              f"{search['first_move_cutoff_rate_by_ply'][ply]:>6.0%}")
+    print(f"\n{'method':<36} {'calls':>10} {'total ms':>10} {'self ms':>10}")
+    for label, row in list(report['functions'].items())[:args.top]:
+        print(f"{label:<36} {row['calls']:>10} {row['total_ms']:>10.1f} {row['self_ms']:>10.1f}")
+    if args.json:
+        profiler.write_json(args.json)
+    if args.collapsed:
+        profiler.write_collapsed(args.collapsed)
+
+
+if __name__ == "__main__":
+    main()
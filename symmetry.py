@@ -0,0 +1,82 @@
+"""Symmetries of the Nine Men's Morris board
+
+The board has 16 symmetries that preserve adjacency and mills: the 8 rotations and
+reflections of the square, each optionally combined with swapping the inner and outer
+rings (the middle ring stays in place). They act on bitboards indexed like main.SQUARES.
+"""
+from main import NO_SQUARE, SQUARE_INDEX, SQUARES, decode_move, encode_move
+
+
+def _ring_swap(x, y):
+    """Square on the same spoke with the inner and outer rings exchanged"""
+    dx, dy = x - 3, y - 3
+    ring = max(abs(dx), abs(dy))  # 3 outer, 2 middle, 1 inner
+    scale = 4 - ring
+    return 3 + (dx // ring) * scale, 3 + (dy // ring) * scale
+
+
+def _symmetry_map(turns, mirrored, swapped):
+    """Permutation of square indices for one symmetry"""
+    images = []
+    for x, y in SQUARES:
+        if swapped:
+            x, y = _ring_swap(x, y)
+        if mirrored:
+            x = 6 - x
+        for _ in range(turns):
+            x, y = 6 - y, x
+        images.append(SQUARE_INDEX[(x, y)])
+    return tuple(images)
+
+
+# Square permutations, the identity first
+SYMMETRIES = tuple(_symmetry_map(turns, mirrored, swapped)
+                   for swapped in (False, True) for mirrored in (False, True) for turns in range(4))
+
+# Index of the symmetry that undoes each one
+INVERSES = tuple(next(j for j, other in enumerate(SYMMETRIES) if all(other[images[square]] == square
+                                                                     for square in range(len(SQUARES))))
+                 for images in SYMMETRIES)
+
+# Per symmetry, three 256-entry tables mapping one byte of a bitboard to its image
+_BYTE_TABLES = tuple(
+    tuple(tuple(sum(1 << images[8 * part + bit] for bit in range(8) if byte >> bit & 1) for byte in range(256))
+          for part in range(3))
+    for images in SYMMETRIES
+)
+
+
+def transform(mask, symmetry):
+    """Image of a bitboard under SYMMETRIES[symmetry]"""
+    low, middle, high = _BYTE_TABLES[symmetry]
+    return low[mask & 255] | middle[mask >> 8 & 255] | high[mask >> 16]
+
+
+def canonicalize(first, second):
+    """Smallest (first, second) image of a pair of bitboards over all 16 symmetries
+
+    The pair is compared on first, then second, so equivalent positions always map to the
+    same pair. Returns (first, second, symmetry) with the symmetry that produced it.
+    """
+    best_first = best_second = None
+    best_symmetry = 0
+    for symmetry, (low, middle, high) in enumerate(_BYTE_TABLES):
+        image = low[first & 255] | middle[first >> 8 & 255] | high[first >> 16]
+        if best_first is not None and image > best_first:
+            continue
+        other = low[second & 255] | middle[second >> 8 & 255] | high[second >> 16]
+        if best_first is None or image < best_first or other < best_second:
+            best_first, best_second, best_symmetry = image, other, symmetry
+    return best_first, best_second, best_symmetry
+
+
+def stabilizer(mask):
+    """Symmetries other than the identity that map mask onto itself"""
+    return tuple(symmetry for symmetry in range(1, len(SYMMETRIES)) if transform(mask, symmetry) == mask)
+
+
+def transform_move(move, symmetry):
+    """Image of an encoded move under SYMMETRIES[symmetry]; NO_SQUARE fields stay as they are"""
+    images = SYMMETRIES[symmetry] + (NO_SQUARE,)
+    source, target, removal = decode_move(move)
+    return encode_move(images[source], images[target], images[removal])